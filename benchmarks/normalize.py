@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Benchmark of the filename normalizer of mymoviepage.
+
+Normalizes a listing of release filenames built repeating the ones in
+release_names.txt, with the normalizer of mymoviepage and with the
+original implementation (recompiling its regexes on every call), and
+checks that both return the same titles."""
+
+import re
+import sys
+import logging
+from time import time
+from optparse import OptionParser
+from os.path import dirname, abspath, join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+import mymoviepage
+
+FIXTURE = join(dirname(abspath(__file__)), 'release_names.txt')
+
+def original_normalize_filename(movie_filename):
+    file_ext_expr = "(?P<name>.*)\.({0})".format(mymoviepage.file_ext)
+    match = re.match(file_ext_expr, movie_filename, re.I)
+    if not match:
+        return None
+    movie_filename = match.group('name')
+
+    purge_words_list = "(?i)({0})(.*)$".format(mymoviepage.purge_words)
+    purge_digit = "(\d{4})(.*)$"
+    purge_spl_chars = "(\[|\()(.*)$"
+    purge_dot_underscore = "(\.|_)"
+    purge_hypen_aps = "(\-|')"
+
+    re_str = re.sub(purge_spl_chars, "", movie_filename, )
+    re_str = re.sub(purge_words_list, "", re_str, re.I)
+    re_str = re.sub(purge_digit, "", re_str, )
+    re_str = re.sub(purge_dot_underscore, " ", re_str, )
+    re_str = re.sub(purge_hypen_aps, "", re_str, )
+
+    return re_str.rstrip().lstrip()
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n',
+                      '--names',
+                      dest='names',
+                      type='int',
+                      help='Number of filenames to normalize. Default: 100000',
+                      default=100000)
+    (options, args) = parser.parse_args()
+    # unprocessable filenames are expected in the fixture
+    logging.disable(logging.ERROR)
+
+    with open(FIXTURE) as f:
+        fixture = [l.strip() for l in f if l.strip()]
+    names = (fixture * (options.names // len(fixture) + 1))[:options.names]
+
+    start = time()
+    expected = [original_normalize_filename(name) for name in names]
+    original = time() - start
+
+    start = time()
+    result = mymoviepage.normalizer.normalize_many(names)
+    compiled = time() - start
+
+    if result != expected:
+        for name, r, e in zip(names, result, expected):
+            if r != e:
+                print 'MISMATCH %r: %r != %r' % (name, r, e)
+        return 1
+    print '%d filenames' % len(names)
+    print 'original: %.2fs (%.2f us/file)' % (original, original / len(names) * 1e6)
+    print 'compiled: %.2fs (%.2f us/file)' % (compiled, compiled / len(names) * 1e6)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
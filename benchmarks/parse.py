@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""Benchmark of the DOM parsers of the http access system.
+
+Parses the given pages, saved from the IMDb web server (by default
+movie_page.html, a synthetic main page of a movie), with the parser of
+the main page of a movie, or the one given.  The pages are parsed with
+the XPaths of the extractors compiled once and evaluated through the
+index of the DOM (if the parser uses it), and with the original
+implementation (passing the XPath strings to lxml for every element,
+walking the whole DOM for every extractor and for the references);
+checks that both return the same data."""
+
+import sys
+import logging
+from time import time
+from optparse import OptionParser
+from os.path import dirname, abspath, join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from imdb.parser.http import movieParser
+from imdb.parser.http.utils import DOMParserBase
+
+FIXTURE = join(dirname(abspath(__file__)), 'movie_page.html')
+
+def reset_plans(parser):
+    for extractor in parser.extractors:
+        extractor._plans.clear()
+
+def parse_pages(parser, pages, rounds, getRefs):
+    # A first round, to leave out the imports and the compilation.
+    results = [parser.parse(page, getRefs=getRefs) for page in pages]
+    start = time()
+    for i in xrange(rounds):
+        results = [parser.parse(page, getRefs=getRefs) for page in pages]
+    return results, time() - start
+
+def main():
+    parser = OptionParser(usage='%prog [options] [page.html ...]')
+    parser.add_option('-p',
+                      '--parser',
+                      dest='parser',
+                      help='Parser of the movieParser module to use. '
+                           'Default: movie_parser',
+                      default='movie_parser')
+    parser.add_option('-m',
+                      '--module',
+                      dest='module',
+                      help='Module used to parse the pages (lxml or '
+                           'beautifulsoup). Default: lxml',
+                      default='lxml')
+    parser.add_option('-r',
+                      '--rounds',
+                      dest='rounds',
+                      type='int',
+                      help='Number of times every page is parsed. Default: 20',
+                      default=20)
+    parser.add_option('-g',
+                      '--get-refs',
+                      dest='getRefs',
+                      action='store_true',
+                      help='Gather the references to movies and persons.',
+                      default=False)
+    (options, args) = parser.parse_args()
+    if not args:
+        args = [FIXTURE]
+    logging.disable(logging.ERROR)
+
+    pages = []
+    for fname in args:
+        with open(fname) as f:
+            pages.append(unicode(f.read(), 'utf-8', 'replace'))
+    domParser = movieParser._OBJECTS[options.parser][0][0](
+                                                useModule=options.module)
+
+    compile_xpath = DOMParserBase._compile_xpath
+    xpath_index = DOMParserBase._xpath_index
+    gather_refs = DOMParserBase.gather_refs
+    DOMParserBase._compile_xpath = lambda self, path: path
+    DOMParserBase._xpath_index = lambda self, dom, index, path, plan: \
+                                        self.xpath(dom, path)
+    DOMParserBase.gather_refs = lambda self, dom, index=None: \
+                                        gather_refs(self, dom)
+    reset_plans(domParser)
+    try:
+        expected, original = parse_pages(domParser, pages, options.rounds,
+                                        options.getRefs)
+    finally:
+        DOMParserBase._compile_xpath = compile_xpath
+        DOMParserBase._xpath_index = xpath_index
+        DOMParserBase.gather_refs = gather_refs
+        reset_plans(domParser)
+    result, compiled = parse_pages(domParser, pages, options.rounds,
+                                    options.getRefs)
+
+    if result != expected:
+        for fname, r, e in zip(args, result, expected):
+            if r != e:
+                print 'MISMATCH %s' % fname
+        return 1
+    parsed = len(pages) * options.rounds
+    print '%d pages parsed (%s)' % (parsed, domParser.usingModule)
+    print 'original: %.2fs (%.2f ms/page)' % (original, original / parsed * 1e3)
+    print 'compiled: %.2fs (%.2f ms/page)' % (compiled, compiled / parsed * 1e3)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -41,6 +41,13 @@ class Movie(_Container):
     # The default sets of information retrieved.
     default_info = ('main', 'plot')
 
+    # Sets of information and keys needed for some common uses.
+    info_profiles = {
+                # Enough to show a movie in a list (as mymoviepage does).
+                'page fields': (('main', ('title', 'year', 'kind',
+                                        'director', 'cast', 'plot outline',
+                                        'rating', 'genres', 'cover url')),)}
+
     # Aliases for some not-so-intuitive keys.
     keys_alias = {
                 'tv schedule': 'airing',
@@ -40,6 +40,13 @@ class Person(_Container):
     # The default sets of information retrieved.
     default_info = ('main', 'filmography', 'biography')
 
+    # Sets of information and keys needed for some common uses.
+    info_profiles = {
+                # The personal details, without the filmography.
+                'summary': (('main', ('name', 'imdbIndex', 'birth date',
+                                    'birth notes', 'death date',
+                                    'death notes', 'headshot', 'akas')),)}
+
     # Aliases for some not-so-intuitive keys.
     keys_alias = {'biography': 'mini biography',
                   'bio': 'mini biography',
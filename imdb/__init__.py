@@ -30,13 +30,14 @@ __version__ = VERSION = '5.0'
 # Import compatibility module (importing it is enough).
 import _compat
 
-import sys, os, ConfigParser, logging
+import sys, os, ConfigParser, logging, threading, Queue, weakref, atexit
 from types import MethodType
 
 from imdb import Movie, Person, Character, Company
 import imdb._logging
 from imdb._exceptions import IMDbError, IMDbDataAccessError, IMDbParserError
-from imdb.utils import build_title, build_name, build_company_name
+from imdb.utils import build_title, build_name, build_company_name, \
+                        RateLimiter
 
 _aux_logger = logging.getLogger('imdbpy.aux')
 
@@ -189,6 +190,9 @@ def IMDb(accessSystem=None, *arguments, **keywords):
     elif accessSystem in ('mobile',):
         from parser.mobile import IMDbMobileAccessSystem
         return IMDbMobileAccessSystem(*arguments, **keywords)
+    elif accessSystem in ('async', 'asynchttp'):
+        from parser.asynchttp import IMDbAsyncHTTPAccessSystem
+        return IMDbAsyncHTTPAccessSystem(*arguments, **keywords)
     elif accessSystem in ('local', 'files'):
         # The local access system was removed since IMDbPY 4.2.
         raise IMDbError('the local access system was removed since IMDbPY 4.2')
@@ -217,6 +221,11 @@ def available_access_systems():
         asList.append('mobile')
     except ImportError:
         pass
+    try:
+        from parser.asynchttp import IMDbAsyncHTTPAccessSystem
+        asList.append('async')
+    except ImportError:
+        pass
     try:
         from parser.sql import IMDbSqlAccessSystem
         asList.append('sql')
@@ -233,6 +242,79 @@ def available_access_systems():
 #      and search_character() methods is always safer.
 encoding = getattr(sys.stdin, 'encoding', '') or sys.getdefaultencoding()
 
+class _WorkerPool(object):
+    """A thread for each of the given workers (see IMDbBase._worker),
+    running the functions submitted by all the calls of the owner
+    access system; the threads are started only once, and stopped when
+    the owner is deleted or at exit."""
+    _pools = weakref.WeakKeyDictionary()
+
+    def __init__(self, owner, workers):
+        self._owner = weakref.ref(owner, self._stop)
+        self._tasks = Queue.Queue()
+        self._threads = []
+        for worker in workers:
+            thread = threading.Thread(target=self._run, args=(worker,))
+            thread.setDaemon(True)
+            thread.start()
+            self._threads.append(thread)
+        self.size = len(workers)
+        self._pools[self] = None
+
+    def _stop(self, ref=None):
+        for thread in self._threads:
+            self._tasks.put(None)
+
+    def _run(self, worker):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            self._call(worker, *task)
+            # Don't keep the arguments of the last call alive.
+            del task
+
+    def _call(self, worker, function, key, done, cancelled):
+        if cancelled is not None and cancelled.isSet():
+            return
+        owner = self._owner()
+        if owner is not None:
+            owner._refresh_worker(worker)
+        del owner
+        try:
+            done.put((key, function(worker), None))
+        except Exception, e:
+            done.put((key, None, sys.exc_info()))
+
+    def close(self, wait=False):
+        """Stop the threads, once the submitted functions are over; if
+        wait is set, return only when they are stopped."""
+        self._stop()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    @classmethod
+    def _stop_all(cls):
+        """Stop the idle threads of all the pools, before the
+        interpreter is shut down."""
+        pools = cls._pools.keys()
+        for pool in pools:
+            pool._stop()
+        for pool in pools:
+            for thread in pool._threads:
+                thread.join(1)
+
+    def submit(self, function, key, done, cancelled=None):
+        """Call function with a worker as the only argument; then put
+        a (key, result, excInfo) tuple in the done queue.  Nothing is
+        done if the cancelled event is set before the call."""
+        self._tasks.put((function, key, done, cancelled))
+
+
+atexit.register(_WorkerPool._stop_all)
+
+
 class IMDbBase:
     """The base class used to search for a movie/person/character and
     to get a Movie/Person/Character object.
@@ -276,6 +358,30 @@ class IMDbBase:
             keywordsResults = 100
         self._keywordsResults = keywordsResults
         self._reraise_exceptions = keywords.get('reraiseExceptions') or False
+        # Keys of the info set being retrieved that are really needed
+        # (None means all); set by update() when an info profile is used.
+        self._requestedKeys = None
+        # Maximum number of info sets retrieved at the same time by update().
+        try:
+            updateConcurrency = int(keywords.get('updateConcurrency') or 1)
+        except (TypeError, ValueError):
+            updateConcurrency = 1
+        self._updateConcurrency = max(updateConcurrency, 1)
+        # Maximum number of objects retrieved at the same time by
+        # get_movies() and the like.
+        try:
+            batchConcurrency = int(keywords.get('batchConcurrency') or 4)
+        except (TypeError, ValueError):
+            batchConcurrency = 4
+        self._batchConcurrency = max(batchConcurrency, 1)
+        # Maximum number of objects retrieved per second by get_movies()
+        # and the like, among all the calls.
+        try:
+            batchRate = float(keywords.get('batchRate') or 0)
+        except (TypeError, ValueError):
+            batchRate = 0
+        self._batchLimiter = RateLimiter(batchRate)
+        self._init_pools()
         self.set_imdb_urls(keywords.get('imdbURL_base') or imdbURL_base)
 
     def set_imdb_urls(self, imdbURL_base):
@@ -413,6 +519,15 @@ class IMDbBase:
 
     get_episode = get_movie
 
+    def get_movies(self, movieIDs, info=Movie.Movie.default_info,
+                    modFunct=None):
+        """Iterate over the Movie objects for the given movieIDs, as
+        soon as they are retrieved (not necessarily in the same order);
+        repeated movieIDs are retrieved only once.
+
+        info and modFunct are the same as for the get_movie method."""
+        return self._get_many('movie', movieIDs, info, modFunct)
+
     def _search_movie(self, title, results):
         """Return a list of tuples (movieID, {movieData})"""
         # XXX: for the real implementation, see the method of the
@@ -474,6 +589,15 @@ class IMDbBase:
         self.update(person, info)
         return person
 
+    def get_persons(self, personIDs, info=Person.Person.default_info,
+                    modFunct=None):
+        """Iterate over the Person objects for the given personIDs, as
+        soon as they are retrieved (not necessarily in the same order);
+        repeated personIDs are retrieved only once.
+
+        info and modFunct are the same as for the get_person method."""
+        return self._get_many('person', personIDs, info, modFunct)
+
     def _search_person(self, name, results):
         """Return a list of tuples (personID, {personData})"""
         # XXX: for the real implementation, see the method of the
@@ -519,6 +643,15 @@ class IMDbBase:
         self.update(character, info)
         return character
 
+    def get_characters(self, characterIDs,
+                    info=Character.Character.default_info, modFunct=None):
+        """Iterate over the Character objects for the given characterIDs, as
+        soon as they are retrieved (not necessarily in the same order);
+        repeated characterIDs are retrieved only once.
+
+        info and modFunct are the same as for the get_character method."""
+        return self._get_many('character', characterIDs, info, modFunct)
+
     def _search_character(self, name, results):
         """Return a list of tuples (characterID, {characterData})"""
         # XXX: for the real implementation, see the method of the
@@ -564,6 +697,15 @@ class IMDbBase:
         self.update(company, info)
         return company
 
+    def get_companies(self, companyIDs, info=Company.Company.default_info,
+                    modFunct=None):
+        """Iterate over the Company objects for the given companyIDs, as
+        soon as they are retrieved (not necessarily in the same order);
+        repeated companyIDs are retrieved only once.
+
+        info and modFunct are the same as for the get_company method."""
+        return self._get_many('company', companyIDs, info, modFunct)
+
     def _search_company(self, name, results):
         """Return a list of tuples (companyID, {companyData})"""
         # XXX: for the real implementation, see the method of the
@@ -702,11 +844,167 @@ class IMDbBase:
         return Company.Company(accessSystem=self.accessSystem,
                                     *arguments, **keywords)
 
+    def _retrieve_infoset(self, aSystem, mop, prefix, mopID, i, profile):
+        """Return the data of the i info set of the mopID object, as
+        returned by the get_PREFIX_INFOSET method of aSystem."""
+        self._imdb_logger.debug('retrieving "%s" info set', i)
+        try:
+            method = getattr(aSystem, 'get_%s_%s' %
+                                (prefix, i.replace(' ', '_')))
+        except AttributeError:
+            self._imdb_logger.error('unknown information set "%s"', i)
+            # Keeps going.
+            method = lambda *x: {}
+        aSystem._requestedKeys = profile.get(i)
+        try:
+            try:
+                return method(mopID)
+            except Exception, e:
+                self._imdb_logger.critical('caught an exception retrieving ' \
+                                    'or parsing "%s" info set for mopID ' \
+                                    '"%s" (accessSystem: %s)',
+                                    i, mopID, mop.accessSystem, exc_info=True)
+                # If requested by the user, reraise the exception.
+                if self._reraise_exceptions:
+                    raise
+                return {}
+        finally:
+            aSystem._requestedKeys = None
+
+    def _retrieve_infosets(self, aSystem, mop, prefix, mopID, info, profile):
+        """Return the list of the data of the given info sets, in the same
+        order; up to self._updateConcurrency info sets are retrieved at
+        the same time, if aSystem supports it (see the _worker method)."""
+        pool = None
+        if min(self._updateConcurrency, len(info)) > 1:
+            pool = aSystem._pool('update', self._updateConcurrency)
+        if pool is None:
+            return [self._retrieve_infoset(aSystem, mop, prefix, mopID, i,
+                                            profile) for i in info]
+        done = Queue.Queue()
+        for idx, i in enumerate(info):
+            pool.submit(lambda worker, i=i: self._retrieve_infoset(worker,
+                                        mop, prefix, mopID, i, profile),
+                        idx, done)
+        results = [None] * len(info)
+        errors = [None] * len(info)
+        for x in xrange(len(info)):
+            idx, results[idx], errors[idx] = done.get()
+        for error in errors:
+            if error is not None:
+                raise error[0], error[1], error[2]
+        return results
+
+    def _worker(self):
+        """Return an object with the same get_* methods, that can be
+        used to retrieve info sets in a thread other than the ones using
+        this instance, or None if the access system doesn't support
+        concurrent retrieval of info sets; must be overridden by the
+        subclass.  The worker must have its own pools (see the
+        _init_pools method)."""
+        return None
+
+    def _refresh_worker(self, worker):
+        """Update a worker with the current settings of this instance,
+        every time it's used; can be overridden by the subclass."""
+        pass
+
+    def _init_pools(self):
+        """Forget the pools of workers (see the _pool method)."""
+        self._pools = {}
+        self._poolsLock = threading.Lock()
+
+    def _pool(self, name, size):
+        """Return the _WorkerPool with the given name, with up to size
+        workers, created at the first call and reused by the next ones;
+        return None if the access system doesn't support workers."""
+        self._poolsLock.acquire()
+        try:
+            if name not in self._pools:
+                workers = filter(None, [self._worker()
+                                        for x in xrange(size)])
+                pool = None
+                if len(workers) > 1:
+                    pool = _WorkerPool(self, workers)
+                self._pools[name] = pool
+            return self._pools[name]
+        finally:
+            self._poolsLock.release()
+
+    def _get_many(self, prefix, mopIDs, info, modFunct):
+        """Iterate over the objects of the given kind (prefix) and IDs,
+        as they are retrieved; repeated IDs are retrieved only once."""
+        normalize = getattr(self, '_normalize_%sID' % prefix)
+        getReal = getattr(self, '_get_real_%sID' % prefix)
+        seen = set()
+        uniqueIDs = []
+        for mopID in mopIDs:
+            mopID = getReal(normalize(mopID))
+            if mopID in seen:
+                continue
+            seen.add(mopID)
+            uniqueIDs.append(mopID)
+        return self._retrieve_many(prefix, uniqueIDs, info, modFunct)
+
+    def _retrieve_one(self, aSystem, prefix, mopID, info, modFunct):
+        """Return the object of the given kind (prefix) and ID, with
+        the info sets retrieved by aSystem."""
+        self._batchLimiter.wait()
+        if prefix == 'movie':
+            mop = Movie.Movie(movieID=mopID, accessSystem=self.accessSystem)
+        elif prefix == 'person':
+            mop = Person.Person(personID=mopID,
+                                accessSystem=self.accessSystem)
+        elif prefix == 'character':
+            mop = Character.Character(characterID=mopID,
+                                accessSystem=self.accessSystem)
+        else:
+            mop = Company.Company(companyID=mopID,
+                                accessSystem=self.accessSystem)
+        modFunct = modFunct or self._defModFunct
+        if modFunct is not None:
+            mop.set_mod_funct(modFunct)
+        aSystem.update(mop, info)
+        return mop
+
+    def _retrieve_many(self, prefix, mopIDs, info, modFunct):
+        """Iterate over the objects of the given kind (prefix) and IDs,
+        as they are retrieved; up to self._batchConcurrency objects are
+        retrieved at the same time, if the access system supports it
+        (see the _worker method).  Can be overridden by the subclass,
+        to retrieve many objects more efficiently."""
+        pool = None
+        if min(self._batchConcurrency, len(mopIDs)) > 1:
+            pool = self._pool('batch', self._batchConcurrency)
+        if pool is None:
+            for mopID in mopIDs:
+                yield self._retrieve_one(self, prefix, mopID, info, modFunct)
+            return
+        done = Queue.Queue()
+        # Don't retrieve the pending objects, if the caller stops
+        # iterating over the results.
+        cancelled = threading.Event()
+        for mopID in mopIDs:
+            pool.submit(lambda worker, mopID=mopID: self._retrieve_one(worker,
+                                        prefix, mopID, info, modFunct),
+                        mopID, done, cancelled)
+        try:
+            for x in xrange(len(mopIDs)):
+                mopID, mop, error = done.get()
+                if error is not None:
+                    raise error[0], error[1], error[2]
+                yield mop
+        finally:
+            cancelled.set()
+
     def update(self, mop, info=None, override=0):
         """Given a Movie, Person, Character or Company object with only
         partial information, retrieve the required set of information.
 
-        info is the list of sets of information to retrieve.
+        info is the list of sets of information to retrieve, or the
+        name of one of the info_profiles of the object: in this case only
+        the keys listed in the profile are retrieved (if the access system
+        supports it), and the info sets are not marked as retrieved.
 
         If override is set, the information are retrieved and updated
         even if they're already in the object."""
@@ -741,8 +1039,12 @@ class IMDbBase:
             aSystem = self
         else:
             aSystem = IMDb(mop.accessSystem)
+        profile = {}
         if info is None:
             info = mop.default_info
+        elif isinstance(info, (str, unicode)) and info in mop.info_profiles:
+            profile = dict(mop.info_profiles[info])
+            info = [i for i, keys in mop.info_profiles[info]]
         elif info == 'all':
             if isinstance(mop, Movie.Movie):
                 info = self.get_movie_infoset()
@@ -754,41 +1056,25 @@ class IMDbBase:
                 info = self.get_company_infoset()
         if not isinstance(info, (tuple, list)):
             info = (info,)
+        info = [i for i in info
+                if i and (override or i not in mop.current_info)]
+        results = self._retrieve_infosets(aSystem, mop, prefix, mopID, info,
+                                            profile)
         res = {}
-        for i in info:
-            if i in mop.current_info and not override:
-                continue
-            if not i:
-                continue
-            self._imdb_logger.debug('retrieving "%s" info set', i)
-            try:
-                method = getattr(aSystem, 'get_%s_%s' %
-                                    (prefix, i.replace(' ', '_')))
-            except AttributeError:
-                self._imdb_logger.error('unknown information set "%s"', i)
-                # Keeps going.
-                method = lambda *x: {}
-            try:
-                ret = method(mopID)
-            except Exception, e:
-                self._imdb_logger.critical('caught an exception retrieving ' \
-                                    'or parsing "%s" info set for mopID ' \
-                                    '"%s" (accessSystem: %s)',
-                                    i, mopID, mop.accessSystem, exc_info=True)
-                ret = {}
-                # If requested by the user, reraise the exception.
-                if self._reraise_exceptions:
-                    raise
+        for i, ret in zip(info, results):
+            requestedKeys = profile.get(i)
             keys = None
             if 'data' in ret:
                 res.update(ret['data'])
                 if isinstance(ret['data'], dict):
                     keys = ret['data'].keys()
-            if 'info sets' in ret:
-                for ri in ret['info sets']:
-                    mop.add_to_current_info(ri, keys, mainInfoset=i)
-            else:
-                mop.add_to_current_info(i, keys)
+            # If only some keys were requested, the info set is incomplete.
+            if requestedKeys is None:
+                if 'info sets' in ret:
+                    for ri in ret['info sets']:
+                        mop.add_to_current_info(ri, keys, mainInfoset=i)
+                else:
+                    mop.add_to_current_info(i, keys)
             if 'titlesRefs' in ret:
                 mop.update_titlesRefs(ret['titlesRefs'])
             if 'namesRefs' in ret:
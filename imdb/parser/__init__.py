@@ -23,6 +23,6 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 """
 
-__all__ = ['http', 'mobile', 'sql']
+__all__ = ['http', 'mobile', 'asynchttp', 'sql']
 
 
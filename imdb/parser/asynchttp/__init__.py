@@ -0,0 +1,226 @@
+"""
+parser.asynchttp package (imdb package).
+
+This package provides the IMDbAsyncHTTPAccessSystem class used to access
+IMDb's data through the web interface without blocking the caller.
+the imdb.IMDb function will return an instance of this class when
+called with the 'accessSystem' argument set to "async".
+
+The requests are not multiplexed by an event loop over non-blocking
+sockets: every call runs, with the blocking I/O of the "http" access
+system, in a thread of a pool, and only the caller is not blocked.
+
+Copyright 2026 agent <agent@local>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+"""
+
+import logging
+import threading
+
+from imdb import _WorkerPool
+from imdb.parser.http import IMDbHTTPAccessSystem
+
+# Methods of IMDbHTTPAccessSystem that return a Future, in the
+# asynchronous access system.
+_ASYNC_METHODS = ('search_movie', 'search_episode', 'get_movie',
+                'get_episode', 'search_person', 'get_person',
+                'search_character', 'get_character', 'search_company',
+                'get_company', 'search_keyword', 'get_keyword',
+                'get_top250_movies', 'get_bottom100_movies', 'update')
+
+
+class Future(object):
+    """The result of a call running in another thread.
+
+    The method names are the same of concurrent.futures.Future; an
+    event loop can be notified of the result with add_done_callback,
+    for example using its call_soon_threadsafe method."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._done = False
+        self._result = None
+        self._excInfo = None
+        self._callbacks = []
+
+    def done(self):
+        """Return True if the call is over."""
+        return self._done
+
+    def _wait(self, timeout=None):
+        """Wait for the end of the call, for at most timeout seconds."""
+        self._cond.acquire()
+        try:
+            if not self._done:
+                self._cond.wait(timeout)
+            if not self._done:
+                raise RuntimeError('the call is not over yet')
+        finally:
+            self._cond.release()
+
+    def result(self, timeout=None):
+        """Return the value returned by the call, or raise the exception
+        it raised; wait for at most timeout seconds."""
+        self._wait(timeout)
+        if self._excInfo is not None:
+            raise self._excInfo[0], self._excInfo[1], self._excInfo[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """Return the exception raised by the call, or None; wait for
+        at most timeout seconds."""
+        self._wait(timeout)
+        if self._excInfo is not None:
+            return self._excInfo[1]
+        return None
+
+    def add_done_callback(self, fn):
+        """Call fn with this Future as the only argument, at the end of
+        the call (in the thread running it); if the call is already
+        over, fn is called immediately."""
+        self._cond.acquire()
+        try:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        finally:
+            self._cond.release()
+        fn(self)
+
+    def _set(self, result=None, excInfo=None):
+        """Store the outcome of the call and run the callbacks."""
+        self._cond.acquire()
+        try:
+            self._result = result
+            self._excInfo = excInfo
+            self._done = True
+            self._cond.notifyAll()
+            callbacks = self._callbacks
+            self._callbacks = []
+        finally:
+            self._cond.release()
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception:
+                IMDbAsyncHTTPAccessSystem._async_logger.error(
+                        'exception in a Future callback', exc_info=True)
+
+
+class IMDbAsyncHTTPAccessSystem(IMDbHTTPAccessSystem):
+    """The class used to access IMDb's data through the web, without
+    blocking the caller.
+
+    The search_*, get_* and update methods return at once a Future;
+    the pages are retrieved and parsed by a pool of maxWorkers threads,
+    started at the first call, each one with its own URL opener and
+    parsers, sharing the connection pool and the caches.  The returned
+    objects are the same of the "http" access system.
+
+    Every call in progress keeps a thread busy with blocking I/O: at
+    most maxWorkers calls run at the same time, and the others wait in
+    a queue."""
+
+    accessSystem = 'http'
+    _async_logger = logging.getLogger('imdbpy.parser.asynchttp')
+
+    def __init__(self, maxWorkers=8, *arguments, **keywords):
+        """Initialize the access system."""
+        IMDbHTTPAccessSystem.__init__(self, *arguments, **keywords)
+        try:
+            maxWorkers = int(maxWorkers)
+        except (TypeError, ValueError):
+            maxWorkers = 8
+        self._maxWorkers = max(maxWorkers, 1)
+        self._blocking = None
+
+    # The workers are plain IMDbHTTPAccessSystem instances, whose
+    # methods are the blocking ones.
+    _workerClass = IMDbHTTPAccessSystem
+
+    def _blocking_worker(self):
+        """Return the worker used by the blocking methods, created at
+        the first call and refreshed at every call."""
+        self._poolsLock.acquire()
+        try:
+            if self._blocking is None:
+                self._blocking = self._worker()
+            worker = self._blocking
+        finally:
+            self._poolsLock.release()
+        self._refresh_worker(worker)
+        return worker
+
+    def _retrieve_many(self, prefix, mopIDs, info, modFunct):
+        """get_movies() and the like are still blocking iterators."""
+        return self._blocking_worker()._retrieve_many(prefix, mopIDs,
+                                                    info, modFunct)
+
+    def _async_pool(self):
+        """Return the _WorkerPool running the submitted calls, created
+        at the first call and reused until close() is called."""
+        self._poolsLock.acquire()
+        try:
+            if 'async' not in self._pools:
+                workers = [self._worker()
+                            for x in xrange(self._maxWorkers)]
+                self._pools['async'] = _WorkerPool(self, workers)
+            return self._pools['async']
+        finally:
+            self._poolsLock.release()
+
+    def _submit(self, name, arguments, keywords):
+        """Return a Future for the call of the name method."""
+        future = Future()
+        def call(worker):
+            return getattr(worker, name)(*arguments, **keywords)
+        self._async_pool().submit(call, name, _FutureSetter(future))
+        return future
+
+    def close(self, wait=True):
+        """Stop the threads, once the submitted calls are over; if wait
+        is set, return only when they are stopped."""
+        self._poolsLock.acquire()
+        try:
+            pool = self._pools.pop('async', None)
+        finally:
+            self._poolsLock.release()
+        if pool is not None:
+            pool.close(wait)
+
+
+class _FutureSetter(object):
+    """Store in a Future the (key, result, excInfo) tuples put by
+    a _WorkerPool."""
+    def __init__(self, future):
+        self.future = future
+
+    def put(self, item):
+        key, result, excInfo = item
+        self.future._set(result, excInfo)
+
+
+def _asyncMethod(name):
+    """Return a method submitting a call of the name method of
+    IMDbHTTPAccessSystem."""
+    def method(self, *arguments, **keywords):
+        return self._submit(name, arguments, keywords)
+    method.__name__ = name
+    method.__doc__ = 'Return a Future for the result of the %s method ' \
+                    'of IMDbHTTPAccessSystem.' % name
+    return method
+
+for _name in _ASYNC_METHODS:
+    setattr(IMDbAsyncHTTPAccessSystem, _name, _asyncMethod(_name))
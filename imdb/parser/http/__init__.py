@@ -25,11 +25,18 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 """
 
+import re
 import sys
+import zlib
+import time
+import types
 import socket
+import base64
 import logging
-from urllib import FancyURLopener, quote_plus
-from codecs import lookup
+from httplib import HTTPException
+from urllib import FancyURLopener, quote_plus, unquote, addinfourl, \
+                    splithost, splittype, splituser, proxy_bypass
+from codecs import lookup, getincrementaldecoder
 
 from imdb import IMDbBase, imdbURL_movie_main, imdbURL_person_main, \
                 imdbURL_character_main, imdbURL_company_main, \
@@ -37,6 +44,10 @@ from imdb import IMDbBase, imdbURL_movie_main, imdbURL_person_main, \
                 imdbURL_bottom100
 from imdb.utils import analyze_title
 from imdb._exceptions import IMDbDataAccessError, IMDbParserError
+from connectionPool import ConnectionPool, PooledResponse
+from responseCache import ResponseCache, DiskStore
+from parseCache import ParseCache
+from throttle import Throttle, RETRY_CODES, parseRetryAfter
 
 import searchMovieParser
 import searchPersonParser
@@ -100,6 +111,15 @@ class _ModuleProxy:
 
 PY_VERSION = sys.version_info[:2]
 
+# Size of the chunks read from the responses.
+_READ_SIZE = 16384
+
+# Bytes at the beginning of a page where its charset is looked for.
+_SNIFF_SIZE = 4096
+
+# The charset declared in a meta tag.
+_re_charset = re.compile(r'<meta[^>]+charset\s*=\s*["\']?([-\w.:]+)', re.I)
+
 
 # The cookies for the "adult" search.
 # Please don't mess with these account.
@@ -128,20 +148,46 @@ class _FakeURLOpener(object):
     """Fake URLOpener object, used to return empty strings instead of
     errors.
     """
-    def __init__(self, url, headers):
+    def __init__(self, url, headers, code=None):
         self.url = url
         self.headers = headers
+        self.code = code
     def read(self, *args, **kwds): return ''
     def close(self, *args, **kwds): pass
     def info(self, *args, **kwds): return self.headers
 
 
 class IMDbURLopener(FancyURLopener):
-    """Fetch web pages and handle errors."""
+    """Fetch web pages and handle errors.
+
+    HTTP requests use the persistent connections of the given
+    ConnectionPool (a new one, by default); if pool is None, a new
+    connection is opened for every request.
+
+    The retrieved pages are cached by cache, if set: a ResponseCache
+    or any object with the same interface.
+
+    If compress is true, the server is asked to send the pages
+    compressed with gzip or deflate; they are decompressed while they're
+    read."""
     _logger = logging.getLogger('imdbpy.parser.http.urlopener')
 
     def __init__(self, *args, **kwargs):
         self._last_url = u''
+        self.pool = kwargs.pop('pool', -1)
+        if self.pool == -1:
+            self.pool = ConnectionPool()
+        self.cache = kwargs.pop('cache', None)
+        # The charsets of the pages of every host (can be shared).
+        self.charsets = kwargs.pop('charsets', None)
+        if self.charsets is None:
+            self.charsets = {}
+        compress = kwargs.pop('compress', True)
+        # Bytes received from the server and bytes of content, for the
+        # last request and since the creation of the object.
+        self.lastTransfer = None
+        self.bytesOnWire = 0
+        self.bytesDecoded = 0
         FancyURLopener.__init__(self, *args, **kwargs)
         # Headers to add to every request.
         # XXX: IMDb's web server doesn't like urllib-based programs,
@@ -151,6 +197,8 @@ class IMDbURLopener(FancyURLopener):
             self.del_header(header)
         self.set_header('User-Agent', 'Mozilla/5.0')
         self.set_header('Accept-Language', 'en-us,en;q=0.5')
+        if compress:
+            self.set_header('Accept-Encoding', 'gzip, deflate')
         # XXX: This class is used also to perform "Exact Primary
         #      [Title|Name]" searches, and so by default the cookie is set.
         c_header = 'uu=%s; id=%s' % (_cookie_uu, _cookie_id)
@@ -191,58 +239,328 @@ class IMDbURLopener(FancyURLopener):
                 del self.addheaders[index]
                 break
 
-    def retrieve_unicode(self, url, size=-1):
+    def open_http(self, url, data=None):
+        """Use HTTP protocol."""
+        if self.pool is None:
+            return FancyURLopener.open_http(self, url, data)
+        return self._open_pooled('http', url, data)
+
+    def open_https(self, url, data=None):
+        """Use HTTPS protocol."""
+        if self.pool is None:
+            return FancyURLopener.open_https(self, url, data)
+        return self._open_pooled('https', url, data)
+
+    def _open_pooled(self, scheme, url, data=None):
+        """Send a request using a connection of the pool; url is a
+        string, or a (proxy, full url) tuple when a proxy is used,
+        as in FancyURLopener.open_http."""
+        user_passwd = None
+        proxy_passwd = None
+        if isinstance(url, str):
+            host, selector = splithost(url)
+            if host:
+                user_passwd, host = splituser(host)
+                host = unquote(host)
+            realhost = host
+        else:
+            host, selector = url
+            proxy_passwd, host = splituser(host)
+            urltype, rest = splittype(selector)
+            url = rest
+            if urltype.lower() != scheme:
+                realhost = None
+            else:
+                realhost, rest = splithost(rest)
+                if realhost:
+                    user_passwd, realhost = splituser(realhost)
+                if user_passwd:
+                    selector = '%s://%s%s' % (urltype, realhost, rest)
+                if proxy_bypass(realhost):
+                    host = realhost
+        if not host:
+            raise IOError('http error', 'no host given')
+        extraHeaders = []
+        if proxy_passwd:
+            extraHeaders.append(('Proxy-Authorization', 'Basic %s' %
+                        base64.b64encode(unquote(proxy_passwd)).strip()))
+        if user_passwd:
+            extraHeaders.append(('Authorization', 'Basic %s' %
+                        base64.b64encode(unquote(user_passwd)).strip()))
+        if realhost:
+            extraHeaders.append(('Host', realhost))
+        if data is not None:
+            extraHeaders.append(('Content-Type',
+                                'application/x-www-form-urlencoded'))
+        while True:
+            conn, reused = self.pool.get(scheme, host)
+            try:
+                conn.putrequest(data is None and 'GET' or 'POST', selector,
+                                skip_host=bool(realhost))
+                for header, value in extraHeaders + self.addheaders:
+                    conn.putheader(header, value)
+                conn.endheaders(data)
+                response = conn.getresponse()
+            except (HTTPException, socket.error), e:
+                self.pool.put(scheme, host, conn, reusable=False)
+                if reused:
+                    # The server has closed the idle connection: retry
+                    # with a new one.
+                    continue
+                if isinstance(e, socket.error):
+                    raise
+                raise IOError('http protocol error', 0,
+                                'got a bad status line', None)
+            break
+        fp = PooledResponse(self.pool, scheme, host, conn, response)
+        errcode = response.status
+        if 200 <= errcode < 300:
+            return addinfourl(fp, response.msg, scheme + ':' + url, errcode)
+        if data is None:
+            return self.http_error(url, fp, errcode, response.reason,
+                                    response.msg)
+        return self.http_error(url, fp, errcode, response.reason,
+                                response.msg, data)
+
+    def retrieve_unicode(self, url, size=-1, stopAt=None):
         """Retrieves the given URL, and returns a unicode string,
         trying to guess the encoding of the data (assuming latin_1
-        by default)"""
-        encode = None
+        by default).
+
+        If stopAt is a sequence of strings, only the page up to the
+        last of them is retrieved (see the _read method).
+
+        If a ResponseCache is set, fresh cached pages are returned
+        without any request, and stale ones are revalidated with the
+        ETag and Last-Modified headers sent by the server."""
+        cache = self.cache
+        if cache is None:
+            return self._retrieve_unicode(url, size, stopAt=stopAt)[0] or u''
+        headers = self.addheaders
+        if size != -1:
+            headers = headers + [('Range', 'bytes=0-%d' % size)]
+        if stopAt:
+            # Not sent: only to keep partial pages apart in the cache.
+            headers = headers + [('X-Stop-At', repr(tuple(stopAt)))]
+        key = cache.key(url, headers)
+        entry = cache.get(key)
+        if entry is not None and cache.isFresh(entry):
+            cache.hit(entry)
+            self._last_url = entry['url']
+            return unicode(entry['content'], 'utf-8')
+        cache.miss()
+        validators = []
+        if entry is not None:
+            validators = cache.validators(entry)
+        content, uopener = self._retrieve_unicode(url, size, validators,
+                                                stopAt)
+        if content is None:
+            if entry is None:
+                return u''
+            cache.refresh(key, entry, uopener.info())
+            self._last_url = entry['url']
+            return unicode(entry['content'], 'utf-8')
+        if getattr(uopener, 'code', None) in (200, 206):
+            cache.set(key, self._last_url, content, uopener.info())
+        return content
+
+    def _retrieve_unicode(self, url, size=-1, headers=(), stopAt=None):
+        """Retrieve the given URL, sending also the given (header, value)
+        pairs; return the content as a unicode string (None if the
+        server answered "304 Not Modified") and the response."""
+        headers = list(headers)
+        if size != -1:
+            headers.append(('Range', 'bytes=0-%d' % size))
         try:
-            if size != -1:
-                self.set_header('Range', 'bytes=0-%d' % size)
-            uopener = self.open(url)
-            kwds = {}
-            if PY_VERSION > (2, 3) and not IN_GAE:
-                kwds['size'] = size
-            content = uopener.read(**kwds)
-            self._last_url = uopener.url
-            # Maybe the server is so nice to tell us the charset...
-            server_encode = uopener.info().getparam('charset')
-            # Otherwise, look at the content-type HTML meta tag.
-            if server_encode is None and content:
-                begin_h = content.find('text/html; charset=')
-                if begin_h != -1:
-                    end_h = content[19+begin_h:].find('"')
-                    if end_h != -1:
-                        server_encode = content[19+begin_h:19+begin_h+end_h]
-            if server_encode:
+            try:
+                for header, value in headers:
+                    self.set_header(header, value)
+                uopener = self.open(url)
+                if getattr(uopener, 'code', None) == 304:
+                    uopener.close()
+                    self.close()
+                    self._count_transfer(url, 0, 0)
+                    return None, uopener
+                content = self._read(url, uopener, size, stopAt)
+                self._last_url = uopener.url
+                uopener.close()
+                self.close()
+            except IOError, e:
+                raise IMDbDataAccessError({'errcode': e.errno,
+                                            'errmsg': str(e.strerror),
+                                            'url': url,
+                                            'proxy': self.get_proxy(),
+                                            'exception type': 'IOError',
+                                            'original exception': e})
+        finally:
+            # Ensure that the headers are removed.
+            for header, value in headers:
+                self.del_header(header)
+        return content, uopener
+
+    def _read(self, url, uopener, size=-1, stopAt=None):
+        """Return the content of the response as a unicode string (at
+        most size bytes of it, if size is not -1); it's decompressed
+        while it's read, if the server used the gzip or deflate content
+        encoding, and decoded chunk by chunk (see the _decode method).
+
+        If stopAt is a sequence of strings, the reading stops as soon
+        as all of them were found, in the given order: the content is
+        cut after the last one, and the rest of the page is never
+        received."""
+        coding = (uopener.info().get('content-encoding') or '').strip().lower()
+        if coding not in ('gzip', 'x-gzip', 'deflate'):
+            coding = 'identity'
+        transfer = {'bytesOnWire': 0, 'bytesDecoded': 0}
+        chunks = self._chunks(url, uopener, coding, size, transfer)
+        stopAt = list(stopAt or ())
+        content = []
+        tail = u''
+        for text in self._decode(url, uopener, chunks):
+            if stopAt:
+                # The marker may begin at the end of the previous chunk.
+                window = tail + text
+                searchFrom = 0
+                while stopAt:
+                    index = window.find(stopAt[0], searchFrom)
+                    if index == -1:
+                        break
+                    searchFrom = index + len(stopAt.pop(0))
+                if not stopAt:
+                    content.append(text[:searchFrom - len(tail)])
+                    self._logger.debug('stopped reading %s after %d bytes',
+                                        url, transfer['bytesDecoded'])
+                    break
+                keep = len(stopAt[0]) - 1
+                tail = window[max(searchFrom, len(window) - keep):]
+            content.append(text)
+        self._count_transfer(url, transfer['bytesOnWire'],
+                            transfer['bytesDecoded'], coding)
+        return u''.join(content)
+
+    def _chunks(self, url, uopener, coding, size, transfer):
+        """Iterate over the chunks of the content of the response (at
+        most size bytes, if size is not -1), decompressed if coding is
+        not 'identity'; the received and decompressed bytes are added
+        to the 'bytesOnWire' and 'bytesDecoded' keys of transfer."""
+        decomp = None
+        while size == -1 or transfer['bytesDecoded'] < size:
+            if IN_GAE:
+                data = uopener.read()
+            else:
+                data = uopener.read(_READ_SIZE)
+            if data:
+                transfer['bytesOnWire'] += len(data)
+            if coding != 'identity':
+                if decomp is None and data:
+                    if coding != 'deflate':
+                        decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    elif len(data) > 1 and ord(data[0]) & 0x0F == 8 and \
+                            (ord(data[0]) * 256 + ord(data[1])) % 31 == 0:
+                        # zlib stream, as required by the RFC.
+                        decomp = zlib.decompressobj()
+                    else:
+                        # Raw deflate stream, sent by some servers.
+                        decomp = zlib.decompressobj(-zlib.MAX_WBITS)
+                if decomp is None:
+                    return
                 try:
-                    if lookup(server_encode):
-                        encode = server_encode
-                except (LookupError, ValueError, TypeError):
-                    pass
-            uopener.close()
-            if size != -1:
-                self.del_header('Range')
-            self.close()
-        except IOError, e:
+                    if data:
+                        data = decomp.decompress(data)
+                    else:
+                        data = decomp.flush()
+                        decomp = None
+                except zlib.error, e:
+                    self._logger.warn('unable to decompress %s: %s', url, e)
+                    return
+            elif not data:
+                return
             if size != -1:
-                # Ensure that the Range header is removed.
-                self.del_header('Range')
-            raise IMDbDataAccessError({'errcode': e.errno,
-                                        'errmsg': str(e.strerror),
-                                        'url': url,
-                                        'proxy': self.get_proxy(),
-                                        'exception type': 'IOError',
-                                        'original exception': e})
+                data = data[:size - transfer['bytesDecoded']]
+            transfer['bytesDecoded'] += len(data)
+            if data:
+                yield data
+            if IN_GAE and coding == 'identity':
+                return
+
+    def _decode(self, url, uopener, chunks):
+        """Iterate over the chunks of bytes, decoded to unicode strings
+        with the charset found by the _charset method; only the first
+        _SNIFF_SIZE bytes are kept aside, to look for the charset."""
+        head = []
+        headSize = 0
+        decoder = None
+        for data in chunks:
+            if decoder is None:
+                head.append(data)
+                headSize += len(data)
+                if headSize < _SNIFF_SIZE:
+                    continue
+                data = ''.join(head)
+                head = None
+                decoder = self._decoder(url, uopener, data)
+            yield decoder.decode(data)
+        if decoder is None:
+            data = ''.join(head)
+            decoder = self._decoder(url, uopener, data)
+            yield decoder.decode(data, True)
+        else:
+            yield decoder.decode('', True)
+
+    def _decoder(self, url, uopener, head):
+        """Return an incremental decoder for the charset of the page;
+        head are the first bytes of its content."""
+        encode = self._charset(url, uopener, head)
         if encode is None:
             encode = 'latin_1'
             # The detection of the encoding is error prone...
             self._logger.warn('Unable to detect the encoding of the retrieved '
                         'page [%s]; falling back to default latin1.', encode)
-        ##print unicode(content, encode, 'replace').encode('utf8')
-        return unicode(content, encode, 'replace')
+        return getincrementaldecoder(encode)('replace')
+
+    def _charset(self, url, uopener, head):
+        """Return the charset of the page, sent by the server or declared
+        in a meta tag in head (the first bytes of the content); it's
+        remembered for the host, and used for its pages that declare
+        none.  Return None if it's unknown."""
+        host = (splithost(splittype(uopener.url or url)[1])[0] or '').lower()
+        # Maybe the server is so nice to tell us the charset...
+        candidates = [uopener.info().getparam('charset')]
+        # Otherwise, look at the meta tags.
+        match = _re_charset.search(head)
+        if match:
+            candidates.append(match.group(1))
+        for charset in candidates:
+            if not charset:
+                continue
+            try:
+                lookup(charset)
+            except (LookupError, ValueError, TypeError):
+                continue
+            self.charsets[host] = charset
+            return charset
+        return self.charsets.get(host)
+
+    def _count_transfer(self, url, onWire, decoded, coding='identity'):
+        """Record the bytes received from the server and the bytes of
+        content of a request."""
+        self.lastTransfer = {'url': url, 'bytesOnWire': onWire,
+                            'bytesDecoded': decoded, 'encoding': coding}
+        self.bytesOnWire += onWire
+        self.bytesDecoded += decoded
+        self._logger.debug('%s: %d bytes transferred, %d decoded (%s)',
+                            url, onWire, decoded, coding)
+
+    def http_error_304(self, url, fp, errcode, errmsg, headers, data=None):
+        """The page cached by the ResponseCache is still valid."""
+        if fp is not None:
+            fp.close()
+        return _FakeURLOpener(url, headers, errcode)
 
     def http_error_default(self, url, fp, errcode, errmsg, headers):
+        if fp is not None:
+            # Release the connection.
+            fp.close()
         if errcode == 404:
             self._logger.warn('404 code returned for %s: %s (headers: %s)',
                                 url, errmsg, headers)
@@ -273,12 +591,51 @@ class IMDbHTTPAccessSystem(IMDbBase):
     accessSystem = 'http'
     _http_logger = logging.getLogger('imdbpy.parser.http')
 
+    # The class of the workers returned by _worker; None means the
+    # class of the instance.
+    _workerClass = None
+
     def __init__(self, isThin=0, adultSearch=1, proxy=-1, oldParsers=False,
                 fallBackToNew=False, useModule=None, cookie_id=-1,
-                timeout=30, cookie_uu=None, *arguments, **keywords):
+                timeout=30, cookie_uu=None, keepAlive=True,
+                maxConnectionsPerHost=2, connectionIdleTimeout=60,
+                cacheSize=0, cacheTTL=3600, cacheDir=None,
+                parseCacheSize=0, parseCacheDir=None, compressTransfers=True,
+                requestRate=None, requestBurst=1, hostRates=None,
+                maxRetries=3, retryBackoff=1.0, breakerThreshold=5,
+                breakerTimeout=60, *arguments, **keywords):
         """Initialize the access system."""
         IMDbBase.__init__(self, *arguments, **keywords)
-        self.urlOpener =  IMDbURLopener()
+        # When keepAlive is set, the connections to every host are kept
+        # open for connectionIdleTimeout seconds and reused, up to
+        # maxConnectionsPerHost connections at the same time.
+        pool = None
+        if keepAlive:
+            pool = ConnectionPool(maxPerHost=maxConnectionsPerHost,
+                                    idleTimeout=connectionIdleTimeout)
+        # When cacheSize or cacheDir are set, the retrieved pages are
+        # cached (the cacheSize most recently used in memory, all of them
+        # in cacheDir) and reused for cacheTTL seconds.
+        cache = None
+        if cacheSize or cacheDir:
+            store = None
+            if cacheDir:
+                store = DiskStore(cacheDir)
+            cache = ResponseCache(maxEntries=cacheSize, ttl=cacheTTL,
+                                    store=store)
+        # At most requestRate requests per second are sent to every host
+        # (hostRates maps host names to (rate, burst) pairs); failed
+        # requests are retried up to maxRetries times, and a host is
+        # left alone for breakerTimeout seconds after breakerThreshold
+        # consecutive errors.  Shared by all the workers.
+        self._throttle = Throttle(rate=requestRate, burst=requestBurst,
+                                hostRates=hostRates, maxRetries=maxRetries,
+                                backoff=retryBackoff,
+                                breakerThreshold=breakerThreshold,
+                                breakerTimeout=breakerTimeout)
+        # When compressTransfers is set, the pages are sent compressed.
+        self.urlOpener =  IMDbURLopener(pool=pool, cache=cache,
+                                        compress=compressTransfers)
         # When isThin is set, we're parsing the "maindetails" page
         # of a movie (instead of the "combined" page) and movie/person
         # references are not collected if no defaultModFunct is provided.
@@ -306,6 +663,16 @@ class IMDbHTTPAccessSystem(IMDbBase):
             if not isinstance(useModule, (list, tuple)) and ',' in useModule:
                 useModule = useModule.split(',')
         _def = {'_modFunct': self._defModFunct, '_as': self.accessSystem}
+        # When parseCacheSize or parseCacheDir are set, the results of
+        # the parsers are cached (the parseCacheSize most recently used
+        # in memory, all of them in parseCacheDir), keyed by the parser
+        # and the parsed page.
+        if parseCacheSize or parseCacheDir:
+            store = None
+            if parseCacheDir:
+                store = DiskStore(parseCacheDir)
+            _def['_parseCache'] = ParseCache(maxEntries=parseCacheSize,
+                                            store=store)
         # Proxy objects.
         self.smProxy = _ModuleProxy(searchMovieParser, defaultKeys=_def,
                                     oldParsers=oldParsers, useModule=useModule,
@@ -438,8 +805,9 @@ class IMDbHTTPAccessSystem(IMDbBase):
         else:
             self.urlOpener.del_header('Cookie')
 
-    def _retrieve(self, url, size=-1, _noCookies=False):
-        """Retrieve the given URL."""
+    def _retrieve(self, url, size=-1, _noCookies=False, stopAt=None):
+        """Retrieve the given URL; if stopAt is a sequence of strings,
+        only the page up to the last of them is retrieved."""
         ##print url
         _cookies = None
         # XXX: quite obscene, but in some very limited
@@ -449,19 +817,98 @@ class IMDbHTTPAccessSystem(IMDbBase):
             _cookies = self.urlOpener.get_header('Cookie')
             self.del_cookies()
         self._http_logger.debug('fetching url %s (size: %d)', url, size)
+        host = (splithost(splittype(url)[1])[0] or '').lower()
+        attempt = 0
         try:
-            ret = self.urlOpener.retrieve_unicode(url, size=size)
+            while True:
+                if not self._throttle.acquire(host):
+                    raise IMDbDataAccessError({'url': url,
+                                    'errcode': 'circuit open',
+                                    'errmsg': 'too many errors from %s' % host,
+                                    'error type': 'circuit breaker',
+                                    'proxy': self.get_proxy()})
+                try:
+                    try:
+                        ret = self.urlOpener.retrieve_unicode(url, size=size,
+                                                            stopAt=stopAt)
+                    except IMDbDataAccessError, e:
+                        delay = self._retry_delay(host, attempt, e)
+                        if delay is None:
+                            raise
+                        self._http_logger.warn('retrying %s in %.1f seconds',
+                                                url, delay)
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                    except Exception:
+                        self._throttle.failure(host, attempt, retry=False)
+                        raise
+                    self._throttle.success(host)
+                    return ret
+                finally:
+                    # Even if its outcome wasn't recorded, a trial request
+                    # must not keep the circuit breaker open.
+                    self._throttle.release(host)
         finally:
             if _noCookies and _cookies:
                 self.urlOpener.set_header('Cookie', _cookies)
-        return ret
 
-    def _get_search_content(self, kind, ton, results):
+    def _retry_delay(self, host, attempt, error):
+        """Record the outcome of a request to host that raised error;
+        return the number of seconds to wait before retrying it, or None
+        if it must not be retried."""
+        info = error.args and error.args[0]
+        if not isinstance(info, dict):
+            return self._throttle.failure(host, attempt, retry=False)
+        retryAfter = None
+        if info.get('errcode') in RETRY_CODES:
+            headers = info.get('headers')
+            if headers is not None:
+                retryAfter = parseRetryAfter(headers.get('retry-after'))
+        elif info.get('exception type') != 'IOError':
+            # Not a network error, nor a temporary failure of the server:
+            # if the server answered (a page not found, for example), the
+            # host is working.
+            if info.get('error type') == 'http_error_default':
+                self._throttle.success(host)
+                return None
+            return self._throttle.failure(host, attempt, retry=False)
+        return self._throttle.failure(host, attempt, retryAfter)
+
+    def _worker(self):
+        """Return a copy of this instance, to be used to retrieve info
+        sets in another thread; it has its own URL opener and parsers,
+        but shares the connection pool and the caches."""
+        workerClass = self._workerClass or self.__class__
+        worker = types.InstanceType(workerClass, self.__dict__.copy())
+        urlOpener = IMDbURLopener(pool=self.urlOpener.pool,
+                                    cache=self.urlOpener.cache,
+                                    charsets=self.urlOpener.charsets)
+        urlOpener.addheaders = list(self.urlOpener.addheaders)
+        urlOpener.proxies = self.urlOpener.proxies.copy()
+        worker.urlOpener = urlOpener
+        worker._init_pools()
+        for name, value in self.__dict__.items():
+            if isinstance(value, _ModuleProxy):
+                setattr(worker, name, _ModuleProxy(value._module,
+                                            defaultKeys=value._defaultKeys,
+                                            useModule=value.useModule))
+        return worker
+
+    def _refresh_worker(self, worker):
+        """Use the current headers (cookies included) and proxies in the
+        URL opener of the worker."""
+        worker.urlOpener.addheaders = list(self.urlOpener.addheaders)
+        worker.urlOpener.proxies = self.urlOpener.proxies.copy()
+
+    def _get_search_content(self, kind, ton, results, stopAt=None):
         """Retrieve the web page for a given search.
         kind can be 'tt' (for titles), 'nm' (for names),
         'char' (for characters) or 'co' (for companies).
         ton is the title or the name to search.
-        results is the maximum number of results to be retrieved."""
+        results is the maximum number of results to be retrieved.
+        stopAt are the stop markers of the parser (see
+        DOMParserBase.stop_markers)."""
         if isinstance(ton, unicode):
             try:
                 ton = ton.encode('utf-8')
@@ -474,7 +921,7 @@ class IMDbHTTPAccessSystem(IMDbBase):
         params = 'q=%s&s=%s&mx=%s' % (quote_plus(ton), kind, str(results))
         if kind == 'ep':
             params = params.replace('s=ep&', 's=tt&ttype=ep&', 1)
-        cont = self._retrieve(self.urls['find'] % params)
+        cont = self._retrieve(self.urls['find'] % params, stopAt=stopAt)
         #print 'URL:', imdbURL_find % params
         if cont.find('Your search returned more than') == -1 or \
                 cont.find("displayed the exact matches") == -1:
@@ -483,7 +930,8 @@ class IMDbHTTPAccessSystem(IMDbBase):
         # titles or names contain the string we're looking for.
         params = 'q=%s&ls=%s&lm=0' % (quote_plus(ton), kind)
         size = 131072 + results * 512
-        return self._retrieve(self.urls['find'] % params, size=size)
+        return self._retrieve(self.urls['find'] % params, size=size,
+                                stopAt=stopAt)
 
     def _search_movie(self, title, results):
         # The URL of the query.
@@ -492,19 +940,26 @@ class IMDbHTTPAccessSystem(IMDbBase):
         ##params = urllib.urlencode({'tt': 'on','mx': str(results),'q': title})
         ##params = 'q=%s&tt=on&mx=%s' % (quote_plus(title), str(results))
         ##cont = self._retrieve(imdbURL_find % params)
-        cont = self._get_search_content('tt', title, results)
-        return self.smProxy.search_movie_parser.parse(cont, results=results)['data']
+        parser = self.smProxy.search_movie_parser
+        cont = self._get_search_content('tt', title, results,
+                                        stopAt=parser.stop_markers())
+        return parser.parse(cont, results=results)['data']
 
     def _search_episode(self, title, results):
         t_dict = analyze_title(title)
         if t_dict['kind'] == 'episode':
             title = t_dict['title']
-        cont = self._get_search_content('ep', title, results)
-        return self.smProxy.search_movie_parser.parse(cont, results=results)['data']
+        parser = self.smProxy.search_movie_parser
+        cont = self._get_search_content('ep', title, results,
+                                        stopAt=parser.stop_markers())
+        return parser.parse(cont, results=results)['data']
 
     def get_movie_main(self, movieID):
-        cont = self._retrieve(self.urls['movie_main'] % movieID + 'combined')
-        return self.mProxy.movie_parser.parse(cont, mdparse=self._mdparse)
+        stopAt = self.mProxy.movie_parser.stop_markers(self._requestedKeys)
+        cont = self._retrieve(self.urls['movie_main'] % movieID + 'combined',
+                                stopAt=stopAt)
+        return self.mProxy.movie_parser.parse(cont, mdparse=self._mdparse,
+                                            keys=self._requestedKeys)
 
     def get_movie_full_credits(self, movieID):
         cont = self._retrieve(self.urls['movie_main'] % movieID + 'fullcredits')
@@ -710,12 +1165,15 @@ class IMDbHTTPAccessSystem(IMDbBase):
         ##params = urllib.urlencode({'nm': 'on', 'mx': str(results), 'q': name})
         #params = 'q=%s&nm=on&mx=%s' % (quote_plus(name), str(results))
         #cont = self._retrieve(imdbURL_find % params)
-        cont = self._get_search_content('nm', name, results)
-        return self.spProxy.search_person_parser.parse(cont, results=results)['data']
+        parser = self.spProxy.search_person_parser
+        cont = self._get_search_content('nm', name, results,
+                                        stopAt=parser.stop_markers())
+        return parser.parse(cont, results=results)['data']
 
     def get_person_main(self, personID):
         cont = self._retrieve(self.urls['person_main'] % personID + 'maindetails')
-        ret = self.pProxy.maindetails_parser.parse(cont)
+        ret = self.pProxy.maindetails_parser.parse(cont,
+                                                keys=self._requestedKeys)
         ret['info sets'] = ('main', 'filmography')
         return ret
 
@@ -767,8 +1225,10 @@ class IMDbHTTPAccessSystem(IMDbBase):
         return self.pProxy.person_keywords_parser.parse(cont)
 
     def _search_character(self, name, results):
-        cont = self._get_search_content('ch', name, results)
-        return self.scProxy.search_character_parser.parse(cont, results=results)['data']
+        parser = self.scProxy.search_character_parser
+        cont = self._get_search_content('ch', name, results,
+                                        stopAt=parser.stop_markers())
+        return parser.parse(cont, results=results)['data']
 
     def get_character_main(self, characterID):
         cont = self._retrieve(self.urls['character_main'] % characterID)
@@ -794,10 +1254,12 @@ class IMDbHTTPAccessSystem(IMDbBase):
                                                     getRefs=self._getRefs)
 
     def _search_company(self, name, results):
-        cont = self._get_search_content('co', name, results)
+        parser = self.scompProxy.search_company_parser
+        cont = self._get_search_content('co', name, results,
+                                        stopAt=parser.stop_markers())
         url = self.urlOpener._last_url
-        return self.scompProxy.search_company_parser.parse(cont, url=url,
-                                                    results=results)['data']
+        return parser.parse(cont, url=url,
+                            results=results)['data']
 
     def get_company_main(self, companyID):
         cont = self._retrieve(self.urls['company_main'] % companyID)
@@ -0,0 +1,177 @@
+"""
+parser.http.connectionPool module (imdb package).
+
+This module provides the pool of persistent HTTP connections used
+by the IMDbURLopener class, so that consecutive requests to the same
+host share a single TCP (and TLS) connection.
+
+Copyright 2026 agent <agent@local>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+"""
+
+import time
+import socket
+import logging
+import threading
+from httplib import HTTPConnection, HTTPException
+try:
+    from httplib import HTTPSConnection
+except ImportError:
+    # Python built without SSL support.
+    HTTPSConnection = None
+
+
+class ConnectionPool(object):
+    """A thread-safe pool of keep-alive HTTP connections.
+
+    At most maxPerHost connections are open at the same time for every
+    (scheme, host) pair: further requests wait for a connection to be
+    released.  Released connections are kept for reuse for idleTimeout
+    seconds at most."""
+    _logger = logging.getLogger('imdbpy.parser.http.connectionPool')
+
+    def __init__(self, maxPerHost=2, idleTimeout=60):
+        self.maxPerHost = maxPerHost
+        self.idleTimeout = idleTimeout
+        self._idle = {}
+        self._busy = {}
+        self._cond = threading.Condition()
+        # Counters, for statistics.
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self, scheme, host):
+        """Open a new connection; the timeout is the default one of
+        the socket module (see IMDbHTTPAccessSystem.set_timeout)."""
+        if scheme == 'https':
+            if HTTPSConnection is None:
+                raise IOError('url error', 'SSL support not available')
+            return HTTPSConnection(host)
+        return HTTPConnection(host)
+
+    def get(self, scheme, host):
+        """Return a connection to the given host and a boolean value
+        which is true if the connection was already used."""
+        key = (scheme, host.lower())
+        self._cond.acquire()
+        try:
+            while True:
+                idle = self._idle.get(key)
+                now = time.time()
+                while idle:
+                    conn, released = idle.pop()
+                    if now - released <= self.idleTimeout:
+                        self._busy[key] = self._busy.get(key, 0) + 1
+                        self.reused += 1
+                        return conn, True
+                    conn.close()
+                if self._busy.get(key, 0) < self.maxPerHost:
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    self.created += 1
+                    break
+                self._cond.wait()
+        finally:
+            self._cond.release()
+        self._logger.debug('opening connection to %s://%s', scheme, host)
+        try:
+            conn = self._connect(scheme, host)
+        except:
+            # Give back the slot taken for the connection.
+            self._cond.acquire()
+            try:
+                self._busy[key] -= 1
+                self.created -= 1
+                self._cond.notify()
+            finally:
+                self._cond.release()
+            raise
+        return conn, False
+
+    def put(self, scheme, host, conn, reusable=True):
+        """Release a connection obtained with get; it's closed unless
+        reusable is true."""
+        key = (scheme, host.lower())
+        if not reusable:
+            conn.close()
+        self._cond.acquire()
+        try:
+            self._busy[key] -= 1
+            if reusable:
+                self._idle.setdefault(key, []).append((conn, time.time()))
+            self._cond.notify()
+        finally:
+            self._cond.release()
+
+    def close(self):
+        """Close all the idle connections."""
+        self._cond.acquire()
+        try:
+            for idle in self._idle.itervalues():
+                for conn, released in idle:
+                    conn.close()
+            self._idle.clear()
+        finally:
+            self._cond.release()
+
+
+class PooledResponse(object):
+    """File-like object returned for a pooled request: the connection
+    goes back to the pool when the response is closed, if the body
+    was completely read and the server allows to keep it alive.
+
+    Bodies of up to drainLimit bytes, with a known length, are read
+    when the response is closed unread."""
+    drainLimit = 64 * 1024
+
+    def __init__(self, pool, scheme, host, conn, response):
+        self._pool = pool
+        self._scheme = scheme
+        self._host = host
+        self._conn = conn
+        self._response = response
+
+    def read(self, size=-1):
+        # A negative size means everything, like for regular files;
+        # httplib would read until the connection is closed.
+        if size is not None and size < 0:
+            size = None
+        return self._response.read(size)
+
+    def readline(self):
+        # HTTPResponse objects have no readline method.
+        return self._response.fp.readline()
+
+    def close(self):
+        if self._conn is None:
+            return
+        response = self._response
+        if not response.isclosed() and not response.will_close and \
+                response.length is not None and \
+                response.length <= self.drainLimit:
+            # A short body left unread (an error page, for example):
+            # read it, to keep the connection.
+            try:
+                response.read()
+            except (HTTPException, socket.error):
+                pass
+        reusable = response.isclosed() and not response.will_close
+        response.close()
+        self._pool.put(self._scheme, self._host, self._conn, reusable)
+        self._conn = None
+
+    def __del__(self):
+        self.close()
+
@@ -165,8 +165,18 @@ class DOMHTMLMovieParser(DOMParserBase):
         result = mparser.parse(combined_details_html_string)
     """
     _containsObjects = True
+    _indexDOM = True
+    # These keys are all found before the end of the cast table.
+    _stopMarkers = ('class="cast"', '</table>')
+    _stopMarkersKeys = frozenset(['title', 'year', 'kind', 'imdbIndex',
+                                'episode of', 'season', 'episode',
+                                'director', 'writer', 'genres',
+                                'plot outline', 'rating', 'votes',
+                                'cover url', 'cast'])
 
     extractors = [Extractor(label='title',
+                            keys=('title', 'year', 'kind', 'imdbIndex',
+                                'episode of', 'season', 'episode'),
                             path="//h1",
                             attrs=Attribute(key='title',
                                         path=".//text()",
@@ -187,6 +197,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                 )),
 
                 Extractor(label='cast',
+                        keys=('cast',),
                         path="//table[@class='cast']//tr",
                         attrs=Attribute(key="cast",
                             multi=True,
@@ -201,6 +212,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                 )),
 
                 Extractor(label='genres',
+                        keys=('genres',),
                         path="//div[@class='info']//a[starts-with(@href," \
                                 " '/Sections/Genres')]",
                         attrs=Attribute(key="genres",
@@ -208,39 +220,52 @@ class DOMHTMLMovieParser(DOMParserBase):
                             path="./text()")),
 
                 Extractor(label='h5sections',
+                        keys=('plot outline', 'aspect ratio', 'mpaa',
+                            'countries', 'languages', 'color info', 'sound mix',
+                            'akas', 'runtimes', 'certificates',
+                            'number of seasons', 'original air date', 'season',
+                            'episode', 'episode of'),
                         path="//div[@class='info']/h5/..",
                         attrs=[
                             Attribute(key="plot summary",
+                                keys=('plot outline',),
                                 path="./h5[starts-with(text(), " \
                                         "'Plot:')]/../div/text()",
                                 postprocess=lambda x: \
                                         x.strip().rstrip('|').rstrip()),
                             Attribute(key="aspect ratio",
+                                keys=('aspect ratio',),
                                 path="./h5[starts-with(text()," \
                                         " 'Aspect')]/../div/text()",
                                 postprocess=lambda x: x.strip()),
                             Attribute(key="mpaa",
+                                keys=('mpaa',),
                                 path="./h5/a[starts-with(text()," \
                                         " 'MPAA')]/../../div/text()",
                                 postprocess=lambda x: x.strip()),
                             Attribute(key="countries",
+                                keys=('countries',),
                                 path="./h5[starts-with(text(), " \
                             "'Countr')]/../div[@class='info-content']//text()",
                             postprocess=makeSplitter('|')),
                             Attribute(key="language",
+                                keys=('languages',),
                                 path="./h5[starts-with(text(), " \
                                         "'Language')]/..//text()",
                                     postprocess=makeSplitter('Language:')),
                             Attribute(key='color info',
+                                keys=('color info',),
                                 path="./h5[starts-with(text(), " \
                                         "'Color')]/..//text()",
                                 postprocess=makeSplitter('Color:')),
                             Attribute(key='sound mix',
+                                keys=('sound mix',),
                                 path="./h5[starts-with(text(), " \
                                         "'Sound Mix')]/..//text()",
                                 postprocess=makeSplitter('Sound Mix:')),
                             # Collects akas not encosed in <i> tags.
                             Attribute(key='other akas',
+                                keys=('akas',),
                                 path="./h5[starts-with(text(), " \
                                         "'Also Known As')]/../div//text()",
                                 postprocess=makeSplitter(sep='::',
@@ -248,29 +273,37 @@ class DOMHTMLMovieParser(DOMParserBase):
                                                 newNotesSep='::',
                                                 strip='"')),
                             Attribute(key='runtimes',
+                                keys=('runtimes',),
                                 path="./h5[starts-with(text(), " \
                                         "'Runtime')]/../div/text()",
                                 postprocess=makeSplitter()),
                             Attribute(key='certificates',
+                                keys=('certificates',),
                                 path="./h5[starts-with(text(), " \
                                         "'Certificat')]/..//text()",
                                 postprocess=makeSplitter('Certification:')),
                             Attribute(key='number of seasons',
+                                keys=('number of seasons',),
                                 path="./h5[starts-with(text(), " \
                                         "'Seasons')]/..//text()",
                                 postprocess=lambda x: x.count('|') + 1),
                             Attribute(key='original air date',
+                                keys=('original air date', 'season',
+                                    'episode'),
                                 path="./h5[starts-with(text(), " \
                                         "'Original Air Date')]/../div/text()"),
                             Attribute(key='tv series link',
+                                keys=('episode of',),
                                 path="./h5[starts-with(text(), " \
                                         "'TV Series')]/..//a/@href"),
                             Attribute(key='tv series title',
+                                keys=('episode of',),
                                 path="./h5[starts-with(text(), " \
                                         "'TV Series')]/..//a/text()")
                             ]),
 
                 Extractor(label='language codes',
+                            keys=('language codes',),
                             path="//h5[starts-with(text(), 'Language')]/..//a[starts-with(@href, '/language/')]",
                             attrs=Attribute(key='language codes', multi=True,
                                     path="./@href",
@@ -278,6 +311,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     )),
 
                 Extractor(label='country codes',
+                            keys=('country codes',),
                             path="//h5[starts-with(text(), 'Country')]/..//a[starts-with(@href, '/country/')]",
                             attrs=Attribute(key='country codes', multi=True,
                                     path="./@href",
@@ -285,6 +319,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     )),
 
                 Extractor(label='creator',
+                            keys=('creator',),
                             path="//h5[starts-with(text(), 'Creator')]/..//a",
                             attrs=Attribute(key='creator', multi=True,
                                     path={'name': "./text()",
@@ -295,6 +330,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     )),
 
                 Extractor(label='thin writer',
+                            keys=('writer',),
                             path="//h5[starts-with(text(), 'Writer')]/..//a",
                             attrs=Attribute(key='thin writer', multi=True,
                                     path={'name': "./text()",
@@ -305,6 +341,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     )),
 
                 Extractor(label='thin director',
+                            keys=('director',),
                             path="//h5[starts-with(text(), 'Director')]/..//a",
                             attrs=Attribute(key='thin director', multi=True,
                                     path={'name': "./text()",
@@ -315,12 +352,14 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     )),
 
                 Extractor(label='top 250/bottom 100',
+                            keys=('top 250 rank', 'bottom 100 rank'),
                             path="//div[@class='starbar-special']/" \
                                     "a[starts-with(@href, '/chart/')]",
                             attrs=Attribute(key='top/bottom rank',
                                             path="./text()")),
 
                 Extractor(label='series years',
+                            keys=('series years',),
                             path="//div[@id='tn15title']//span" \
                                 "[starts-with(text(), 'TV series')]",
                             attrs=Attribute(key='series years',
@@ -329,6 +368,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                             x.replace('TV series','').strip())),
 
                 Extractor(label='number of episodes',
+                            keys=('number of episodes',),
                             path="//a[@title='Full Episode List']",
                             attrs=Attribute(key='number of episodes',
                                     path="./text()",
@@ -336,6 +376,7 @@ class DOMHTMLMovieParser(DOMParserBase):
                                             _toInt(x, [(' Episodes', '')]))),
 
                 Extractor(label='akas',
+                        keys=('akas',),
                         path="//i[@class='transl']",
                         attrs=Attribute(key='akas', multi=True, path='text()',
                                 postprocess=lambda x:
@@ -343,24 +384,28 @@ class DOMHTMLMovieParser(DOMParserBase):
                                     '"::', 1).strip('"').replace('  ', ' '))),
 
                 Extractor(label='production notes/status',
+                        keys=('production status',),
                         path="//h5[starts-with(text(), 'Status:')]/..//div[@class='info-content']",
                         attrs=Attribute(key='production status',
                                 path=".//text()",
                                 postprocess=lambda x: x.strip().split('|')[0].strip().lower())),
 
                 Extractor(label='production notes/status updated',
+                        keys=('production status updated',),
                         path="//h5[starts-with(text(), 'Status Updated:')]/..//div[@class='info-content']",
                         attrs=Attribute(key='production status updated',
                                 path=".//text()",
                                 postprocess=lambda x: x.strip())),
 
                 Extractor(label='production notes/comments',
+                        keys=('production comments',),
                         path="//h5[starts-with(text(), 'Comments:')]/..//div[@class='info-content']",
                         attrs=Attribute(key='production comments',
                                 path=".//text()",
                                 postprocess=lambda x: x.strip())),
 
                 Extractor(label='production notes/note',
+                        keys=('production note',),
                         path="//h5[starts-with(text(), 'Note:')]/..//div[@class='info-content']",
                         attrs=Attribute(key='production note',
                                 path=".//text()",
@@ -383,16 +428,19 @@ class DOMHTMLMovieParser(DOMParserBase):
                             )),
 
                 Extractor(label='rating',
+                        keys=('rating',),
                         path="//div[@class='starbar-meta']/b",
                         attrs=Attribute(key='rating',
                                         path=".//text()")),
 
                 Extractor(label='votes',
+                        keys=('votes',),
                         path="//div[@class='starbar-meta']/a[@href]",
                         attrs=Attribute(key='votes',
                                         path=".//text()")),
 
                 Extractor(label='cover url',
+                        keys=('cover url',),
                         path="//a[@name='poster']",
                         attrs=Attribute(key='cover url',
                                         path="./img/@src"))
@@ -0,0 +1,158 @@
+"""
+parser.http.parseCache module (imdb package).
+
+This module provides the cache of the results of the DOMParserBase.parse
+method, so that parsing again a page that didn't change costs only
+a lookup.
+
+Copyright 2026 agent <agent@local>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+"""
+
+import zlib
+import logging
+import threading
+import cPickle
+from types import MethodType
+from cStringIO import StringIO
+from hashlib import sha1
+from collections import OrderedDict
+
+
+# Types of the parser attributes that identify its configuration.
+_scalarTypes = (str, unicode, int, long, float, bool, type(None))
+
+
+class ParseCache(object):
+    """Cache of the results of the parsers.
+
+    Results are stored as zlib-compressed pickles, up to maxEntries of
+    the most recently used in memory and all of them in the optional
+    second level store (see responseCache.DiskStore).
+
+    The modFunct function of the parser, set to the Movie/Person/...
+    instances in the results, is not stored: the one of the parser
+    that asks for the result is used.  Strings of the DOM (like the
+    NavigableStrings of BeautifulSoup, which refer to the whole tree)
+    are stored as plain unicode strings."""
+    _logger = logging.getLogger('imdbpy.parser.http.parseCache')
+
+    def __init__(self, maxEntries=128, store=None):
+        self.maxEntries = maxEntries
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, parser, html_string, kwds):
+        """Return the key of the result of parser for the given input
+        and parse keyword arguments; it depends on the parser class and
+        its _parserVersion, the version of IMDbPY and the configuration
+        of the parser."""
+        from imdb import VERSION
+        cls = parser.__class__
+        config = sorted([(k, v) for k, v in parser.__dict__.iteritems()
+                        if isinstance(v, _scalarTypes)])
+        requestedKeys = parser._requestedKeys
+        if requestedKeys is not None:
+            requestedKeys = sorted(requestedKeys)
+        digest = sha1(html_string.encode('utf-8')).hexdigest()
+        return sha1(repr((cls.__module__, cls.__name__,
+                        cls._parserVersion, VERSION, config,
+                        requestedKeys, sorted(kwds.items()),
+                        digest))).hexdigest()
+
+    def _dumps(self, data, modFunct):
+        def persistent_id(obj):
+            if isinstance(obj, MethodType) and obj == modFunct:
+                return 'modFunct'
+            if isinstance(obj, unicode) and type(obj) is not unicode:
+                return ('unicode', unicode(obj))
+            return None
+        f = StringIO()
+        pickler = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = persistent_id
+        pickler.dump(data)
+        return zlib.compress(f.getvalue())
+
+    def _loads(self, value, modFunct):
+        def persistent_load(pid):
+            if pid == 'modFunct':
+                return modFunct
+            return pid[1]
+        unpickler = cPickle.Unpickler(StringIO(zlib.decompress(value)))
+        unpickler.persistent_load = persistent_load
+        return unpickler.load()
+
+    def _count(self, counter):
+        self._lock.acquire()
+        try:
+            setattr(self, counter, getattr(self, counter) + 1)
+        finally:
+            self._lock.release()
+
+    def _remember(self, key, value):
+        if not self.maxEntries:
+            return
+        self._lock.acquire()
+        try:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        finally:
+            self._lock.release()
+
+    def get(self, key, modFunct=None):
+        """Return a new copy of the result stored for key, or None."""
+        self._lock.acquire()
+        try:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+        finally:
+            self._lock.release()
+        if value is None and self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self._remember(key, value)
+        if value is not None:
+            try:
+                data = self._loads(value, modFunct)
+                self._count('hits')
+                return data
+            except Exception, e:
+                self._logger.warn('unable to load cached result %s: %s',
+                                    key, e)
+        self._count('misses')
+        return None
+
+    def set(self, key, data, modFunct=None):
+        """Store the result of a parser."""
+        try:
+            value = self._dumps(data, modFunct)
+        except Exception, e:
+            self._logger.warn('unable to cache result %s: %s', key, e)
+            return
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def stats(self):
+        """Return a dictionary with the counters."""
+        return {'hits': self.hits, 'misses': self.misses}
+
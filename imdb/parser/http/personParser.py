@@ -49,6 +49,22 @@ def build_date(date):
         return year
     return ""
 
+# The keys of the filmography, from the headings of its sections.
+_FILMOGRAPHY_KEYS = ('actor', 'actress', 'self', 'director', 'writer',
+                    'producer', 'composer', 'cinematographer', 'editor',
+                    'casting director', 'production designer',
+                    'art director', 'set decorator', 'costume designer',
+                    'make up department', 'production manager',
+                    'assistant director', 'art department',
+                    'sound department', 'special effects', 'visual effects',
+                    'stunts', 'camera department', 'animation department',
+                    'casting department', 'costume department',
+                    'editorial department', 'location management',
+                    'music department', 'script department',
+                    'transportation department', 'miscellaneous crew',
+                    'soundtrack', 'thanks', 'archive footage')
+
+
 class DOMHTMLMaindetailsParser(DOMParserBase):
     """Parser for the "categorized" (maindetails) page of a given person.
     The page should be provided as a string, as taken from
@@ -96,36 +112,43 @@ class DOMHTMLMaindetailsParser(DOMParserBase):
 
     extractors = [
             Extractor(label='name',
+                        keys=('name',),
                         path="//h1[@class='header']",
                         attrs=Attribute(key='name',
                             path=".//text()",
                             postprocess=lambda x: analyze_name(x,
                                                                canonical=1))),
             Extractor(label='name_index',
+                        keys=('imdbIndex',),
                         path="//h1[@class='header']/span[1]",
                         attrs=Attribute(key='name_index',
                             path="./text()")),
 
             Extractor(label='birth info',
+                        keys=('birth date', 'birth notes'),
                         path="//div[h4='Born:']",
                         attrs=_birth_attrs),
 
             Extractor(label='death info',
+                        keys=('death date', 'death notes'),
                         path="//div[h4='Died:']",
                         attrs=_death_attrs),
 
             Extractor(label='headshot',
+                        keys=('headshot',),
                         path="//td[@id='img_primary']/div[@class='image']/a",
                         attrs=Attribute(key='headshot',
                             path="./img/@src")),
 
             Extractor(label='akas',
+                        keys=('akas',),
                         path="//div[h4='Alternate Names:']",
                         attrs=Attribute(key='akas',
                             path="./text()",
                             postprocess=lambda x: x.strip().split('  '))),
 
             Extractor(label='filmography',
+                        keys=_FILMOGRAPHY_KEYS,
                         group="//div[starts-with(@id, 'filmo-head-')]",
                         group_key="./a[@name]/text()",
                         group_key_normalize=lambda x: x.lower().replace(': ', ' '),
@@ -134,6 +157,7 @@ class DOMHTMLMaindetailsParser(DOMParserBase):
                         attrs=_film_attrs),
 
             Extractor(label='indevelopment',
+                        keys=('in development',),
                         path="//div[starts-with(@class,'devitem')]",
                         attrs=Attribute(key='in development',
                             multi=True,
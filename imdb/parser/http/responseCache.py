@@ -0,0 +1,210 @@
+"""
+parser.http.responseCache module (imdb package).
+
+This module provides the cache of the web pages retrieved by the
+IMDbURLopener class: an in-memory LRU cache, optionally backed by a
+store on disk, with expiration and revalidation of the cached pages.
+
+Copyright 2026 agent <agent@local>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+"""
+
+import os
+import time
+import logging
+import threading
+import cPickle
+from hashlib import sha1
+from collections import OrderedDict
+
+
+class DiskStore(object):
+    """Store the cached responses in a directory, one file for every
+    key; any object with the same get/set methods can be used in its
+    place as the second level of a ResponseCache."""
+    _logger = logging.getLogger('imdbpy.parser.http.responseCache')
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the entry stored for key, or None."""
+        try:
+            f = open(self._path(key), 'rb')
+        except IOError:
+            return None
+        try:
+            try:
+                return cPickle.load(f)
+            except Exception, e:
+                self._logger.warn('unable to read cache entry %s: %s', key, e)
+                return None
+        finally:
+            f.close()
+
+    def set(self, key, entry):
+        """Store the entry for key."""
+        path = self._path(key)
+        tmpPath = '%s.%s.tmp' % (path, threading.current_thread().ident)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                try:
+                    os.makedirs(os.path.dirname(path))
+                except OSError:
+                    # Created by another thread.
+                    pass
+            f = open(tmpPath, 'wb')
+            try:
+                cPickle.dump(entry, f, cPickle.HIGHEST_PROTOCOL)
+            finally:
+                f.close()
+            os.rename(tmpPath, path)
+        except (IOError, OSError), e:
+            self._logger.warn('unable to write cache entry %s: %s', key, e)
+
+
+class ResponseCache(object):
+    """Cache of the retrieved web pages.
+
+    Pages are kept in memory, up to maxEntries of the most recently
+    used ones, and in the optional second level store (e.g. a DiskStore);
+    they are fresh for ttl seconds, after which they are revalidated
+    with the ETag and Last-Modified headers sent by the server, when
+    available.
+
+    The hits, misses, revalidated, bytesFromCache and bytesFromNetwork
+    counters show the effectiveness of the cache."""
+    _logger = logging.getLogger('imdbpy.parser.http.responseCache')
+
+    def __init__(self, maxEntries=256, ttl=3600, store=None):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytesFromCache = 0
+        self.bytesFromNetwork = 0
+
+    def key(self, url, headers):
+        """Return the key of a request for url with the given
+        (header, value) pairs."""
+        return sha1('\n'.join([url] + ['%s: %s' % h
+                                    for h in sorted(headers)])).hexdigest()
+
+    def _remember(self, key, entry):
+        if not self.maxEntries:
+            return
+        self._lock.acquire()
+        try:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        finally:
+            self._lock.release()
+
+    def get(self, key):
+        """Return the cached entry for key, or None; the entry is a
+        dictionary with the 'content' (utf-8 encoded), the final 'url',
+        the 'expires' time and the 'etag' and 'lastModified' validators."""
+        self._lock.acquire()
+        try:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+        finally:
+            self._lock.release()
+        if entry is None and self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    def isFresh(self, entry):
+        return entry['expires'] > time.time()
+
+    def validators(self, entry):
+        """Return the headers to revalidate a stale entry."""
+        headers = []
+        if entry.get('etag'):
+            headers.append(('If-None-Match', entry['etag']))
+        if entry.get('lastModified'):
+            headers.append(('If-Modified-Since', entry['lastModified']))
+        return headers
+
+    def _count(self, **amounts):
+        self._lock.acquire()
+        try:
+            for counter, amount in amounts.iteritems():
+                setattr(self, counter, getattr(self, counter) + amount)
+        finally:
+            self._lock.release()
+
+    def hit(self, entry):
+        """Account for a response served from the cache."""
+        self._count(hits=1, bytesFromCache=len(entry['content']))
+
+    def miss(self):
+        """Account for a response not found in the cache, or stale."""
+        self._count(misses=1)
+
+    def set(self, key, url, content, headers):
+        """Store a response: content is a unicode string, headers
+        the headers sent by the server."""
+        data = content.encode('utf-8')
+        self._count(bytesFromNetwork=len(data))
+        if 'no-store' in (headers.getheader('cache-control') or ''):
+            return
+        entry = {'url': url, 'content': data,
+                'expires': time.time() + self.ttl,
+                'etag': headers.getheader('etag'),
+                'lastModified': headers.getheader('last-modified')}
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(key, entry)
+
+    def refresh(self, key, entry, headers):
+        """Mark as fresh an entry revalidated by the server (with a
+        "304 Not Modified" answer)."""
+        self._count(revalidated=1, bytesFromCache=len(entry['content']))
+        entry = entry.copy()
+        entry['expires'] = time.time() + self.ttl
+        entry['etag'] = headers.getheader('etag') or entry.get('etag')
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(key, entry)
+
+    def stats(self):
+        """Return a dictionary with the counters."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'revalidated': self.revalidated,
+                'bytesFromCache': self.bytesFromCache,
+                'bytesFromNetwork': self.bytesFromNetwork}
+
+    def clear(self):
+        """Remove all the entries kept in memory."""
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._lock.release()
+
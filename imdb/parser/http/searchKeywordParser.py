@@ -50,6 +50,8 @@ class DOMHTMLSearchKeywordParser(DOMHTMLSearchMovieParser):
     _notDirectHitTitle = '<title>imdb keyword'
     _titleBuilder = lambda self, x: x
     _linkPrefix = '/keyword/'
+    # The results are not in the table of the titles.
+    _stopMarkers = None
 
     _attrs = [Attribute(key='data',
                         multi=True,
@@ -81,6 +83,7 @@ class DOMHTMLSearchMovieKeywordParser(DOMHTMLSearchMovieParser):
     keyword."""
 
     _notDirectHitTitle = '<title>best'
+    _stopMarkers = None
 
     _attrs = [Attribute(key='data',
                         multi=True,
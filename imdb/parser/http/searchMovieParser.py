@@ -95,6 +95,8 @@ class DOMHTMLSearchMovieParser(DOMParserBase):
     _notDirectHitTitle = '<title>find - imdb</title>'
     _titleBuilder = lambda self, x: build_title(x)
     _linkPrefix = '/title/tt'
+    # Nothing is needed after the table of the results.
+    _stopMarkers = ('class="findList"', '</table>')
 
     _attrs = [Attribute(key='data',
                         multi=True,
@@ -0,0 +1,230 @@
+"""
+parser.http.throttle module (imdb package).
+
+This module provides the Throttle class used by IMDbHTTPAccessSystem
+to space the requests sent to every host with a token bucket, to retry
+the failed ones with an exponential backoff and to stop sending
+requests to a host that keeps failing.
+
+Copyright 2026 agent <agent@local>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+"""
+
+import time
+import random
+import logging
+import threading
+from rfc822 import parsedate_tz, mktime_tz
+
+
+# HTTP status codes of the responses worth a retry.
+RETRY_CODES = (429, 500, 502, 503, 504)
+
+
+def parseRetryAfter(value, now=None):
+    """Return the number of seconds to wait, from the value of a
+    Retry-After header (a number of seconds or a date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    if now is None:
+        now = time.time()
+    return max(mktime_tz(date) - now, 0)
+
+
+class TokenBucket(object):
+    """Allow rate requests per second on average, and bursts of at
+    most burst requests."""
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._last = time.time()
+        self._pausedUntil = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request can be sent."""
+        while True:
+            self._lock.acquire()
+            try:
+                now = time.time()
+                if now < self._pausedUntil:
+                    delay = self._pausedUntil - now
+                else:
+                    self._tokens = min(self.burst, self._tokens +
+                                        (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            finally:
+                self._lock.release()
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Don't allow any request for the given number of seconds."""
+        self._lock.acquire()
+        try:
+            self._pausedUntil = max(self._pausedUntil, time.time() + seconds)
+            self._tokens = 0
+        finally:
+            self._lock.release()
+
+
+class _Breaker(object):
+    """The state of the circuit breaker of a host."""
+    def __init__(self):
+        self.failures = 0
+        self.openUntil = 0
+        self.trial = False
+
+
+class Throttle(object):
+    """A thread-safe set of per-host limits, shared by all the threads
+    using the same IMDbHTTPAccessSystem.
+
+    At most rate requests per second (with bursts of burst requests)
+    are sent to every host; hostRates can map a host name to a different
+    (rate, burst) pair.  A rate of None means no limit.
+
+    Failed requests are retried up to maxRetries times, waiting each
+    time twice as long (starting with backoff seconds, up to maxBackoff
+    seconds, with a random jitter), or the time asked by the server in
+    the Retry-After header.
+
+    After breakerThreshold consecutive failures, no request is sent to
+    the host for breakerTimeout seconds; after that, a single request
+    is allowed to check if the host is working again."""
+    _logger = logging.getLogger('imdbpy.parser.http.throttle')
+
+    def __init__(self, rate=None, burst=1, hostRates=None, maxRetries=3,
+                backoff=1.0, maxBackoff=60.0, breakerThreshold=5,
+                breakerTimeout=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.hostRates = hostRates or {}
+        self.maxRetries = maxRetries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.breakerThreshold = breakerThreshold
+        self.breakerTimeout = breakerTimeout
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        """Return the TokenBucket of the host, or None."""
+        self._lock.acquire()
+        try:
+            if host not in self._buckets:
+                rate, burst = self.hostRates.get(host,
+                                                (self.rate, self.burst))
+                bucket = None
+                if rate:
+                    bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return self._buckets[host]
+        finally:
+            self._lock.release()
+
+    def _breaker(self, host):
+        """Return the _Breaker of the host; the lock must be held."""
+        if host not in self._breakers:
+            self._breakers[host] = _Breaker()
+        return self._breakers[host]
+
+    def acquire(self, host):
+        """Block until a request can be sent to the host; return False
+        if the circuit breaker of the host is open."""
+        if self.breakerThreshold:
+            self._lock.acquire()
+            try:
+                breaker = self._breaker(host)
+                if breaker.failures >= self.breakerThreshold:
+                    if time.time() < breaker.openUntil or breaker.trial:
+                        return False
+                    # Let a single request through.
+                    breaker.trial = True
+            finally:
+                self._lock.release()
+        bucket = self._bucket(host)
+        if bucket is not None:
+            bucket.acquire()
+        return True
+
+    def success(self, host):
+        """Record a successful request to the host."""
+        if not self.breakerThreshold:
+            return
+        self._lock.acquire()
+        try:
+            breaker = self._breaker(host)
+            breaker.failures = 0
+            breaker.trial = False
+        finally:
+            self._lock.release()
+
+    def release(self, host):
+        """End a request to the host: if it was the trial request and
+        its outcome wasn't recorded, the next request is a new trial."""
+        if not self.breakerThreshold:
+            return
+        self._lock.acquire()
+        try:
+            self._breaker(host).trial = False
+        finally:
+            self._lock.release()
+
+    def failure(self, host, attempt, retryAfter=None, retry=True):
+        """Record a failed request to the host, at the given attempt
+        (starting from 0); return the number of seconds to wait before
+        a retry, or None if the request must not (or, if retry is not
+        set, can't) be retried."""
+        if self.breakerThreshold:
+            self._lock.acquire()
+            try:
+                breaker = self._breaker(host)
+                breaker.failures += 1
+                breaker.trial = False
+                if breaker.failures >= self.breakerThreshold:
+                    breaker.openUntil = time.time() + self.breakerTimeout
+                    self._logger.warn('too many errors from %s; pausing '
+                                    'for %s seconds', host,
+                                    self.breakerTimeout)
+                    return None
+            finally:
+                self._lock.release()
+        if not retry or attempt >= self.maxRetries:
+            return None
+        if retryAfter is not None:
+            delay = min(retryAfter, self.maxBackoff)
+            # Every thread sending requests to the host must wait.
+            bucket = self._bucket(host)
+            if bucket is not None:
+                bucket.pause(delay)
+        else:
+            delay = min(self.backoff * (2 ** attempt), self.maxBackoff)
+            delay = random.uniform(delay / 2, delay)
+        return delay
@@ -25,6 +25,8 @@ Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 import re
 import logging
 import warnings
+from bisect import bisect_right, insort
+from collections import deque
 
 from imdb._exceptions import IMDbError
 
@@ -51,36 +53,150 @@ def analyze_imdbid(href):
 
 
 _modify_keys = list(Movie.keys_tomodify_list) + list(Person.keys_tomodify_list)
-def _putRefs(d, re_titles, re_names, re_characters, lastKey=None):
+
+# How names, titles and characters are referenced, in this order.
+_refsFormats = ((u"'", u"' (qv)"), (u'_', u'_ (qv)'), (u'#', u'# (qv)'))
+
+class _RefsMatcher(object):
+    """Put the (qv) references to names, titles and characters in the
+    strings, finding all of them with a single scan of every string
+    (an Aho-Corasick automaton built with the keys of the references)."""
+    def __init__(self, namesRefs, titlesRefs, charactersRefs):
+        goto = [{}]
+        out = [[]]
+        allRefs = (namesRefs, titlesRefs, charactersRefs)
+        self.kinds = tuple([kind for kind, refs in enumerate(allRefs)
+                            if refs])
+        for kind in self.kinds:
+            for ref in allRefs[kind]:
+                if not ref:
+                    continue
+                node = 0
+                for ch in ref:
+                    nextNode = goto[node].get(ch)
+                    if nextNode is None:
+                        nextNode = len(goto)
+                        goto[node][ch] = nextNode
+                        goto.append({})
+                        out.append([])
+                    node = nextNode
+                out[node].append((len(ref), kind))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].itervalues())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].iteritems():
+                queue.append(child)
+                failNode = fail[node]
+                while failNode and ch not in goto[failNode]:
+                    failNode = fail[failNode]
+                failNode = goto[failNode].get(ch, 0)
+                fail[child] = failNode
+                out[child] = out[child] + out[failNode]
+        self._searchStart = None
+        if goto[0]:
+            self._searchStart = re.compile(u'[%s]' % u''.join(
+                        [re.escape(ch) for ch in goto[0]]), re.U).search
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def _render(self, s, spans, lo, hi, start, end, pieces):
+        """Append to pieces the s[start:end] string, with the references
+        of the spans[lo:hi] matches."""
+        pos = start
+        i = lo
+        while i < hi:
+            mStart, mEnd, kind = spans[i]
+            j = i + 1
+            while j < hi and spans[j][0] < mEnd:
+                j += 1
+            pieces.append(s[pos:mStart])
+            pieces.append(_refsFormats[kind][0])
+            self._render(s, spans, i + 1, j, mStart, mEnd, pieces)
+            pieces.append(_refsFormats[kind][1])
+            pos = mEnd
+            i = j
+        pieces.append(s[pos:end])
+
+    def sub(self, s, kinds):
+        """Return the s string with the references of the given kinds."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        searchStart = self._searchStart
+        if searchStart is None:
+            return s
+        found = {}
+        node = 0
+        end = 0
+        sLen = len(s)
+        while end < sLen:
+            if not node:
+                # Skip to the next character starting a reference.
+                match = searchStart(s, end)
+                if match is None:
+                    break
+                end = match.start()
+            ch = s[end]
+            end += 1
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, kind in out[node]:
+                found.setdefault(kind, []).append((end - length, end))
+        if not found:
+            return s
+        # The references were put with a substitution for every kind;
+        # the matches of a kind can't cross the references already put,
+        # and the longest of the leftmost matches is used.
+        spans = []
+        bounds = []
+        for kind in kinds:
+            if kind not in found:
+                continue
+            pos = 0
+            selected = []
+            for mStart, mEnd in sorted(found[kind],
+                                        key=lambda m: (m[0], -m[1])):
+                if mStart < pos:
+                    continue
+                i = bisect_right(bounds, mStart)
+                if i < len(bounds) and bounds[i] < mEnd:
+                    continue
+                selected.append((mStart, mEnd, kind))
+                pos = mEnd
+            for mStart, mEnd, kind in selected:
+                insort(bounds, mStart)
+                insort(bounds, mEnd)
+            spans.extend(selected)
+        if not spans:
+            return s
+        spans.sort(key=lambda m: (m[0], -m[1], m[2]))
+        pieces = []
+        self._render(s, spans, 0, len(spans), 0, len(s), pieces)
+        return u''.join(pieces)
+
+
+def _putRefs(d, refs, lastKey=None):
     """Iterate over the strings inside list items or dictionary values,
     substitutes movie titles and person names with the (qv) references."""
     if isinstance(d, list):
         for i in xrange(len(d)):
             if isinstance(d[i], (unicode, str)):
                 if lastKey in _modify_keys:
-                    if re_names:
-                        d[i] = re_names.sub(ur"'\1' (qv)", d[i])
-                    if re_titles:
-                        d[i] = re_titles.sub(ur'_\1_ (qv)', d[i])
-                    if re_characters:
-                        d[i] = re_characters.sub(ur'#\1# (qv)', d[i])
+                    d[i] = refs.sub(d[i], refs.kinds)
             elif isinstance(d[i], (list, dict)):
-                _putRefs(d[i], re_titles, re_names, re_characters,
-                        lastKey=lastKey)
+                _putRefs(d[i], refs, lastKey=lastKey)
     elif isinstance(d, dict):
         for k, v in d.items():
             lastKey = k
             if isinstance(v, (unicode, str)):
                 if lastKey in _modify_keys:
-                    if re_names:
-                        d[k] = re_names.sub(ur"'\1' (qv)", v)
-                    if re_titles:
-                        d[k] = re_titles.sub(ur'_\1_ (qv)', v)
-                    if re_characters:
-                        d[k] = re_characters.sub(ur'#\1# (qv)', v)
+                    # Only the last kind of references, as it always was.
+                    d[k] = refs.sub(v, refs.kinds[-1:])
             elif isinstance(v, (list, dict)):
-                _putRefs(d[k], re_titles, re_names, re_characters,
-                        lastKey=lastKey)
+                _putRefs(d[k], refs, lastKey=lastKey)
 
 
 # Handle HTML/XML/SGML entities.
@@ -417,10 +533,99 @@ def build_movie(txt, movieID=None, roleID=None, status=None,
     return m
 
 
+# A path beginning with a descendant step on an element name.
+_re_descendantStep = re.compile(r'^//([a-zA-Z][\w.-]*)(.*)$', re.S)
+# Predicates selecting the elements by their position.
+_re_positional = re.compile(r'\[\s*\d+\s*\]|position\(\)|last\(\)')
+# A predicate selecting the elements by the value of an attribute.
+_re_attrPredicate = re.compile(r'''\[@([\w-]+)=(['"])([^'"]*)\2\]''')
+
+# The links gathered as references: the beginning of the href, its
+# length and the label of the references (see the GatherRefs class).
+_refsLinks = {'name/nm': ('/name/nm', 16, 'names refs'),
+            'title/tt': ('/title/tt', 17, 'titles refs'),
+            'character/ch': ('/character/ch', 21, 'characters refs')}
+
+def _refs_label(href):
+    """Return the label of the references the href belongs to, or None."""
+    if not href:
+        return None
+    match = re_imdbid.search(href)
+    if match is None:
+        return None
+    start, length, label = _refsLinks.get(match.group(1), (None, 0, None))
+    if len(href) != length or not href.startswith(start):
+        return None
+    return label
+
+def _index_plan(path):
+    """Return a (step, candidatesPath) tuple, to evaluate a path
+    beginning with //name through the index of the DOM (see the
+    DOMParserBase._index_dom method): step is a (name, attrs) tuple for
+    the first step of the path, where attrs are the (attribute, value)
+    pairs of its leading predicates on the value of attributes (only
+    these, so that it can be shared by more paths), and candidatesPath
+    is the same path applied to the $candidates node-set, the elements
+    matching step.  Return None if the path can't be evaluated this
+    way."""
+    if '|' in path:
+        return None
+    match = _re_descendantStep.match(path)
+    if match is None:
+        return None
+    name, rest = match.groups()
+    if rest and rest[0] not in '[/':
+        return None
+    # Find the end of the predicates of the first step.
+    depth = 0
+    quote = None
+    end = len(rest)
+    for idx, char in enumerate(rest):
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == '/' and depth == 0:
+            end = idx
+            break
+    predicates = rest[:end]
+    # In a node-set, the position of an element is not the same.
+    if _re_positional.search(predicates):
+        return None
+    attrs = []
+    pos = 0
+    while True:
+        match = _re_attrPredicate.match(predicates, pos)
+        if match is None:
+            break
+        attrs.append((match.group(1), match.group(3)))
+        pos = match.end()
+    return (name, tuple(attrs)), '$candidates%s' % rest
+
+
 class DOMParserBase(object):
     """Base parser to handle HTML data from the IMDb's web server."""
     _defGetRefs = False
     _containsObjects = False
+    # Bump when the output of the parser changes, to invalidate
+    # the results stored by the ParseCache.
+    _parserVersion = 1
+    # A parseCache.ParseCache instance, set by the access system.
+    _parseCache = None
+    # Strings marking the end of the part of the page really needed
+    # (see the stop_markers method), and the keys that can be parsed
+    # from that part (None means all).
+    _stopMarkers = None
+    _stopMarkersKeys = None
+    # If True, the paths of the extractors beginning with //name are
+    # evaluated only over the elements matching their first step, found
+    # walking the DOM only once (see the _index_dom method); lxml only.
+    _indexDOM = False
 
     preprocessors = []
     extractors = []
@@ -446,12 +651,15 @@ class DOMParserBase(object):
             try:
                 if mod == 'lxml':
                     from lxml.html import fromstring
-                    from lxml.etree import tostring
+                    from lxml.etree import tostring, XPath
+                    self._XPath = XPath
                     self._is_xml_unicode = False
                     self.usingModule = 'lxml'
                 elif mod == 'beautifulsoup':
                     from bsouplxml.html import fromstring
                     from bsouplxml.etree import tostring
+                    from bsouplxml.bsoupxpath import get_path
+                    self._get_path = get_path
                     self._is_xml_unicode = True
                     self.usingModule = 'beautifulsoup'
                 else:
@@ -477,6 +685,11 @@ class DOMParserBase(object):
         # Fall-back defaults.
         self._modFunct = None
         self._as = 'http'
+        self._requestedKeys = None
+        # The first steps of the paths looked up by _index_dom.
+        self._indexSteps = None
+        # The GatherRefs instance used by gather_refs.
+        self._refsParser = None
         self._cname = self.__class__.__name__
         self._init()
         self.reset()
@@ -497,18 +710,43 @@ class DOMParserBase(object):
         """Subclasses can override this method, if needed."""
         pass
 
-    def parse(self, html_string, getRefs=None, **kwds):
+    def stop_markers(self, keys=None):
+        """Return the sequence of strings after which the rest of the
+        page is not needed to parse the given keys (all the keys, if
+        None), or None if the whole page is needed."""
+        if not self._stopMarkers:
+            return None
+        if self._stopMarkersKeys is not None:
+            if keys is None or not frozenset(keys) <= self._stopMarkersKeys:
+                return None
+        return self._stopMarkers
+
+    def parse(self, html_string, getRefs=None, keys=None, **kwds):
         """Return the dictionary generated from the given html string;
         getRefs can be used to force the gathering of movies/persons/characters
-        references."""
+        references; if keys is a list of keys, the extractors and the
+        attributes that don't contribute to any of them are skipped."""
         self.reset()
         if getRefs is not None:
             self.getRefs = getRefs
         else:
             self.getRefs = self._defGetRefs
+        if keys is not None:
+            self._requestedKeys = frozenset(keys)
+        else:
+            self._requestedKeys = None
         # Useful only for the testsuite.
         if not isinstance(html_string, unicode):
             html_string = unicode(html_string, 'latin_1', 'replace')
+        parseCache = self._parseCache
+        if parseCache is not None:
+            cacheKey = parseCache.key(self, html_string, kwds)
+            cached = parseCache.get(cacheKey, self._modFunct)
+            if cached is not None:
+                self._titlesRefs = cached['titlesRefs']
+                self._namesRefs = cached['namesRefs']
+                self._charactersRefs = cached['charactersRefs']
+                return cached
         html_string = subXMLRefs(html_string)
         # Temporary fix: self.parse_dom must work even for empty strings.
         html_string = self.preprocess_string(html_string)
@@ -529,13 +767,22 @@ class DOMParserBase(object):
             except Exception, e:
                 self._logger.error('%s: caught exception preprocessing DOM',
                                     self._cname, exc_info=True)
-            if self.getRefs:
+            # The references are useless if they can't be used in any
+            # of the requested keys.
+            getRefs = bool(self.getRefs and (self._requestedKeys is None or
+                    self._requestedKeys.intersection(_modify_keys)))
+            index = None
+            if self._indexDOM or getRefs:
+                # The anchors of the references are found in the same
+                # walk of the DOM.
+                index = self._index_dom(dom, refs=getRefs)
+            if getRefs:
                 try:
-                    self.gather_refs(dom)
+                    self.gather_refs(dom, index)
                 except Exception, e:
                     self._logger.warn('%s: unable to gather refs: %s',
                                     self._cname, exc_info=True)
-            data = self.parse_dom(dom)
+            data = self.parse_dom(dom, index)
         else:
             data = {}
         try:
@@ -546,6 +793,8 @@ class DOMParserBase(object):
         if self._containsObjects:
             self.set_objects_params(data)
         data = self.add_refs(data)
+        if parseCache is not None:
+            parseCache.set(cacheKey, data, self._modFunct)
         return data
 
     def _build_empty_dom(self):
@@ -565,10 +814,15 @@ class DOMParserBase(object):
                                 self._cname, exc_info=True)
             return self._build_empty_dom()
 
-    def xpath(self, element, path):
-        """Return elements matching the given XPath."""
+    def xpath(self, element, path, **variables):
+        """Return elements matching the given XPath (a string, or an
+        XPath compiled by the _compile_xpath method); variables are the
+        values of the XPath variables (lxml only)."""
         try:
-            xpath_result = element.xpath(path)
+            if isinstance(path, basestring):
+                xpath_result = element.xpath(path, **variables)
+            else:
+                xpath_result = path(element, **variables)
             if self._is_xml_unicode:
                 return xpath_result
             result = []
@@ -579,8 +833,125 @@ class DOMParserBase(object):
             return result
         except Exception, e:
             self._logger.error('%s: caught exception extracting XPath "%s"',
+                                self._cname, getattr(path, 'path', path),
+                                exc_info=True)
+            return []
+
+    def _compile_xpath(self, path):
+        """Return the XPath compiled for the module in use, or the string
+        itself if it can't be compiled."""
+        try:
+            if self.usingModule == 'lxml':
+                return self._XPath(path)
+            # BeautifulSoup elements look up the parsed paths by string.
+            self._get_path(path)
+        except Exception, e:
+            self._logger.error('%s: unable to compile XPath "%s"',
                                 self._cname, path, exc_info=True)
+        return path
+
+    def _plan(self, extractor):
+        """Return the XPaths of the extractor, compiled for the module in
+        use: a (path, group, group_key, attrs, indexPlans) tuple, where
+        attrs is a list of (attribute, path, keyPath) tuples (keyPath is
+        None if the key of the attribute is not an XPath) and indexPlans
+        are the index plans of path and group (see _index_plan).  The
+        plan is stored in the extractor, so that it's compiled only once."""
+        plan = extractor._plans.get(self.usingModule)
+        if plan is not None:
+            return plan
+        compile = self._compile_xpath
+        attrs = []
+        for attr in extractor.attrs:
+            if isinstance(attr.path, dict):
+                path = dict([(field, compile(fieldPath))
+                            for field, fieldPath in attr.path.items()])
+            else:
+                path = compile(attr.path)
+            keyPath = None
+            if attr.key is not None and attr.key.startswith('.'):
+                keyPath = compile(attr.key)
+            attrs.append((attr, path, keyPath))
+        indexPlans = []
+        for path in (extractor.path, extractor.group):
+            indexPlan = None
+            if path is not None:
+                indexPlan = _index_plan(path)
+            if indexPlan is not None:
+                step, candidatesPath = indexPlan
+                candidatesPath = compile(candidatesPath)
+                indexPlan = None
+                if not isinstance(candidatesPath, basestring):
+                    indexPlan = (step, candidatesPath)
+            indexPlans.append(indexPlan)
+        group = extractor.group
+        if group is not None:
+            group = compile(group)
+        plan = (compile(extractor.path), group,
+                compile(extractor.group_key), attrs, indexPlans)
+        extractor._plans[self.usingModule] = plan
+        return plan
+
+    def _index_dom(self, dom, refs=False):
+        """Return the index of the DOM: a dictionary mapping the first
+        steps of the paths of the extractors (see the _index_plan
+        function) to the elements matching them, found walking the DOM
+        only once; if refs is set, the 'refs' key maps to the
+        (label, element) pairs of the anchors linking to references
+        (see the gather_refs method).  Return None if the DOM can't be
+        indexed."""
+        if self.usingModule != 'lxml' or not hasattr(dom, 'getroottree'):
+            return None
+        steps = self._indexSteps
+        if steps is None:
+            # The first steps, for every element name.
+            steps = {}
+            if self._indexDOM:
+                for extractor in self.extractors:
+                    for indexPlan in self._plan(extractor)[4]:
+                        if indexPlan is not None:
+                            step = indexPlan[0]
+                            steps.setdefault(step[0], set()).add(step)
+            self._indexSteps = steps
+        index = {}
+        for nameSteps in steps.itervalues():
+            for step in nameSteps:
+                index[step] = []
+        names = steps.keys()
+        if refs:
+            anchors = index['refs'] = []
+            if 'a' not in steps:
+                names.append('a')
+        if not names:
+            return index
+        for element in dom.getroottree().getroot().iter(*names):
+            tag = element.tag
+            if refs and tag == 'a':
+                label = _refs_label(element.get('href'))
+                if label is not None:
+                    anchors.append((label, element))
+            for step in steps.get(tag, ()):
+                for attr, value in step[1]:
+                    if element.get(attr) != value:
+                        break
+                else:
+                    index[step].append(element)
+        return index
+
+    def _xpath_index(self, dom, index, path, indexPlan):
+        """Return the elements of the DOM matching the path, like the
+        xpath method; if possible, the path is evaluated only over the
+        elements matching its first step, found in the index built by
+        the _index_dom method."""
+        if index is None or indexPlan is None:
+            return self.xpath(dom, path)
+        step, candidatesPath = indexPlan
+        candidates = index.get(step)
+        if candidates is None:
+            return self.xpath(dom, path)
+        if not candidates:
             return []
+        return self.xpath(dom, candidatesPath, candidates=candidates)
 
     def tostring(self, element):
         """Convert the element to a string."""
@@ -625,12 +996,19 @@ class DOMParserBase(object):
         ##print html_string.encode('utf8')
         return html_string
 
-    def gather_refs(self, dom):
-        """Collect references."""
-        grParser = GatherRefs(useModule=self._useModule)
+    def gather_refs(self, dom, index=None):
+        """Collect references; the anchors are taken from the index
+        of the DOM, if it was built with them by the _index_dom method."""
+        grParser = self._refsParser
+        if grParser is None:
+            grParser = GatherRefs(useModule=self._useModule)
+            self._refsParser = grParser
         grParser._as = self._as
         grParser._modFunct = self._modFunct
-        refs = grParser.parse_dom(dom)
+        if index is not None and 'refs' in index:
+            refs = grParser.parse_anchors(index['refs'])
+        else:
+            refs = grParser.parse_dom(dom)
         refs = grParser.postprocess_data(refs)
         self._namesRefs = refs['names refs']
         self._titlesRefs = refs['titles refs']
@@ -641,20 +1019,36 @@ class DOMParserBase(object):
         are applied by the parse_dom method."""
         return dom
 
-    def parse_dom(self, dom):
+    def parse_dom(self, dom, index=None):
         """Parse the given dom according to the rules specified
-        in self.extractors."""
+        in self.extractors; index is the index of the DOM, if already
+        built by the _index_dom method."""
         result = {}
+        requestedKeys = self._requestedKeys
+        if index is None and self._indexDOM:
+            index = self._index_dom(dom)
         for extractor in self.extractors:
             ##print extractor.label
-            if extractor.group is None:
+            if requestedKeys is not None and extractor.keys is not None and \
+                    not requestedKeys.intersection(extractor.keys):
+                continue
+            path, groupPath, groupKeyPath, attrs, indexPlans = \
+                    self._plan(extractor)
+            if requestedKeys is not None:
+                attrs = [x for x in attrs if x[0].keys is None or
+                        requestedKeys.intersection(x[0].keys)]
+                if not attrs:
+                    continue
+            if groupPath is None:
                 elements = [(extractor.label, element)
-                            for element in self.xpath(dom, extractor.path)]
+                            for element in self._xpath_index(dom, index,
+                                                    path, indexPlans[0])]
             else:
-                groups = self.xpath(dom, extractor.group)
+                groups = self._xpath_index(dom, index, groupPath,
+                                            indexPlans[1])
                 elements = []
                 for group in groups:
-                    group_key = self.xpath(group, extractor.group_key)
+                    group_key = self.xpath(group, groupKeyPath)
                     if not group_key: continue
                     group_key = group_key[0]
                     # XXX: always tries the conversion to unicode:
@@ -670,23 +1064,22 @@ class DOMParserBase(object):
                                 _m = '%s: unable to apply group_key normalizer'
                                 self._logger.error(_m, self._cname,
                                                     exc_info=True)
-                    group_elements = self.xpath(group, extractor.path)
+                    group_elements = self.xpath(group, path)
                     elements.extend([(group_key, element)
                                      for element in group_elements])
             for group_key, element in elements:
-                for attr in extractor.attrs:
-                    if isinstance(attr.path, dict):
+                for attr, attrPath, keyPath in attrs:
+                    if isinstance(attrPath, dict):
                         data = {}
-                        for field in attr.path.keys():
-                            path = attr.path[field]
-                            value = self.xpath(element, path)
+                        for field, fieldPath in attrPath.items():
+                            value = self.xpath(element, fieldPath)
                             if not value:
                                 data[field] = None
                             else:
                                 # XXX: use u'' , to join?
                                 data[field] = ''.join(value)
                     else:
-                        data = self.xpath(element, attr.path)
+                        data = self.xpath(element, attrPath)
                         if not data:
                             data = None
                         else:
@@ -703,10 +1096,10 @@ class DOMParserBase(object):
                     key = attr.key
                     if key is None:
                         key = group_key
-                    elif key.startswith('.'):
+                    elif keyPath is not None:
                         # assuming this is an xpath
                         try:
-                            key = self.xpath(element, key)[0]
+                            key = self.xpath(element, keyPath)[0]
                         except IndexError:
                             self._logger.error('%s: XPath returned no items',
                                                 self._cname, exc_info=True)
@@ -737,19 +1130,10 @@ class DOMParserBase(object):
     def add_refs(self, data):
         """Modify data according to the expected output."""
         if self.getRefs:
-            titl_re = ur'(%s)' % '|'.join([re.escape(x) for x
-                                            in self._titlesRefs.keys()])
-            if titl_re != ur'()': re_titles = re.compile(titl_re, re.U)
-            else: re_titles = None
-            nam_re = ur'(%s)' % '|'.join([re.escape(x) for x
-                                            in self._namesRefs.keys()])
-            if nam_re != ur'()': re_names = re.compile(nam_re, re.U)
-            else: re_names = None
-            chr_re = ur'(%s)' % '|'.join([re.escape(x) for x
-                                            in self._charactersRefs.keys()])
-            if chr_re != ur'()': re_characters = re.compile(chr_re, re.U)
-            else: re_characters = None
-            _putRefs(data, re_titles, re_names, re_characters)
+            refs = _RefsMatcher(self._namesRefs, self._titlesRefs,
+                                self._charactersRefs)
+            if refs.kinds:
+                _putRefs(data, refs)
         return {'data': data, 'titlesRefs': self._titlesRefs,
                 'namesRefs': self._namesRefs,
                 'charactersRefs': self._charactersRefs}
@@ -758,11 +1142,14 @@ class DOMParserBase(object):
 class Extractor(object):
     """Instruct the DOM parser about how to parse a document."""
     def __init__(self, label, path, attrs, group=None, group_key=None,
-                 group_key_normalize=None):
+                 group_key_normalize=None, keys=None):
         """Initialize an Extractor object, used to instruct the DOM parser
         about how to parse a document."""
         # rarely (never?) used, mostly for debugging purposes.
         self.label = label
+        # The keys (of the final result) this extractor contributes to;
+        # if None, the extractor is never skipped.
+        self.keys = keys
         self.group = group
         if group_key is None:
             self.group_key = ".//text()"
@@ -774,25 +1161,30 @@ class Extractor(object):
         if isinstance(attrs, Attribute):
             attrs = [attrs]
         self.attrs = attrs
+        # The compiled XPaths, for every module (see DOMParserBase._plan).
+        self._plans = {}
 
     def __repr__(self):
         """String representation of an Extractor object."""
         r = '<Extractor id:%s (label=%s, path=%s, attrs=%s, group=%s, ' \
-                'group_key=%s group_key_normalize=%s)>' % (id(self),
+                'group_key=%s group_key_normalize=%s keys=%s)>' % (id(self),
                         self.label, self.path, repr(self.attrs), self.group,
-                        self.group_key, self.group_key_normalize)
+                        self.group_key, self.group_key_normalize, self.keys)
         return r
 
 
 class Attribute(object):
     """The attribute to consider, for a given node."""
     def __init__(self, key, multi=False, path=None, joiner=None,
-                 postprocess=None):
+                 postprocess=None, keys=None):
         """Initialize an Attribute object, used to specify the
         attribute to consider, for a given node."""
         # The key under which information will be saved; can be a string or an
         # XPath. If None, the label of the containing extractor will be used.
         self.key = key
+        # The keys (of the final result) this attribute contributes to;
+        # if None, it's skipped only with its extractor.
+        self.keys = keys
         self.multi = multi
         self.path = path
         if joiner is None:
@@ -804,9 +1196,9 @@ class Attribute(object):
     def __repr__(self):
         """String representation of an Attribute object."""
         r = '<Attribute id:%s (key=%s, multi=%s, path=%s, joiner=%s, ' \
-                'postprocess=%s)>' % (id(self), self.key,
+                'postprocess=%s keys=%s)>' % (id(self), self.key,
                         self.multi, repr(self.path),
-                        self.joiner, repr(self.postprocess))
+                        self.joiner, repr(self.postprocess), self.keys)
         return r
 
 
@@ -821,6 +1213,8 @@ def _parse_ref(text, link, info):
 
 class GatherRefs(DOMParserBase):
     """Parser used to gather references to movies, persons and characters."""
+    _indexDOM = True
+    _infoPath = None
     _attrs = [Attribute(key=None, multi=True,
                         path={
                             'text': './text()',
@@ -845,6 +1239,25 @@ class GatherRefs(DOMParserBase):
             attrs=_attrs),
             ]
 
+    def parse_anchors(self, anchors):
+        """Return the same data of parse_dom, from the (label, element)
+        pairs of the anchors found by the _index_dom method."""
+        infoPath = self._infoPath
+        if infoPath is None:
+            infoPath = self._compile_xpath('./following::text()[1]')
+            self._infoPath = infoPath
+        result = {}
+        for label, element in anchors:
+            text = [element.text] + [child.tail for child in element]
+            text = u''.join([x for x in text if x])
+            link = element.get('href')
+            info = u''
+            if label == 'titles refs':
+                info = ''.join(self.xpath(element, infoPath)).strip()
+            result.setdefault(label, []).append(_parse_ref(text or u'',
+                                                            link, info))
+        return result
+
     def postprocess_data(self, data):
         result = {}
         for item in ('names refs', 'titles refs', 'characters refs'):
@@ -443,17 +443,20 @@ def sub_dict(d, keys):
     return dict([(k, d[k]) for k in keys if k in d])
 
 
-def get_movie_data(movieID, kindDict, fromAka=0, _table=None):
+def get_movie_data(movieID, kindDict, fromAka=0, _table=None, getRow=None):
     """Return a dictionary containing data about the given movieID;
     if fromAka is true, the AkaTitle table is searched; _table is
-    reserved for the imdbpy2sql.py script."""
+    reserved for the imdbpy2sql.py script; if set, getRow(table, id)
+    is used to read the rows."""
     if _table is not None:
         Table = _table
     else:
         if not fromAka: Table = Title
         else: Table = AkaTitle
+    if getRow is None:
+        getRow = lambda table, rowID: table.get(rowID)
     try:
-        m = Table.get(movieID)
+        m = getRow(Table, movieID)
     except Exception, e:
         _aux_logger.warn('Unable to fetch information for movieID %s: %s', movieID, e)
         mdict = {}
@@ -481,11 +484,12 @@ def get_movie_data(movieID, kindDict, fromAka=0, _table=None):
         except: pass
     episodeOfID = m.episodeOfID
     if episodeOfID is not None:
-        ser_dict = get_movie_data(episodeOfID, kindDict, fromAka)
+        ser_dict = get_movie_data(episodeOfID, kindDict, fromAka,
+                                    getRow=getRow)
         mdict['episode of'] = Movie(data=ser_dict, movieID=episodeOfID,
                                     accessSystem='sql')
         if fromAka:
-            ser_note = AkaTitle.get(episodeOfID).note
+            ser_note = getRow(AkaTitle, episodeOfID).note
             if ser_note:
                 mdict['episode of'].notes = ser_note
     return mdict
@@ -538,6 +542,9 @@ class IMDbSqlAccessSystem(IMDbBase):
 
     accessSystem = 'sql'
     _sql_logger = logging.getLogger('imdbpy.parser.sql')
+    # Number of objects whose rows are read together by get_movies()
+    # and the like.
+    _batchSize = 200
 
     def __init__(self, uri, adultSearch=1, useORM=None, *arguments, **keywords):
         """Initialize the access system."""
@@ -644,6 +651,9 @@ class IMDbSqlAccessSystem(IMDbBase):
         self._moviesubs.update(_litd)
         self._moviesubs.update(_busd)
         self.do_adult_search(adultSearch)
+        # Rows read in advance by get_movies() and the like, as
+        # {(tableName, columnName): {value: [rows]}}.
+        self._batchRows = {}
 
     def _findRefs(self, o, trefs, nrefs):
         """Find titles or names references in strings."""
@@ -788,6 +798,120 @@ class IMDbSqlAccessSystem(IMDbBase):
             return None
         return res[0].id
 
+    def _prefetch(self, table, column, values):
+        """Read with a single query (for every _batchSize values) the rows
+        of table having one of the given values in column, and return
+        them; until the end of the current batch, _select_rows and _get_row
+        use these rows instead of querying the database."""
+        values = list(set([v for v in values if v is not None]))
+        found = self._batchRows.setdefault((table._imdbpyName, column), {})
+        tableCol = getattr(table.q, column)
+        rows = []
+        for start in xrange(0, len(values), self._batchSize):
+            chunk = values[start:start+self._batchSize]
+            for value in chunk:
+                found[value] = []
+            for row in table.select(IN(tableCol, chunk)):
+                found[getattr(row, column)].append(row)
+                rows.append(row)
+        return rows
+
+    def _select_rows(self, table, column, value):
+        """Return the rows of table having the given value in column."""
+        rows = self._batchRows.get((table._imdbpyName, column), {}).get(value)
+        if rows is not None:
+            return rows
+        return table.select(getattr(table.q, column) == value)
+
+    def _get_row(self, table, rowID):
+        """Return the row of table with the given id."""
+        rows = self._batchRows.get((table._imdbpyName, 'id'), {}).get(rowID)
+        if rows is None:
+            return table.get(rowID)
+        if not rows:
+            raise NotFoundError('no data for ID %s' % rowID)
+        return rows[0]
+
+    def _movie_data(self, movieID, fromAka=0):
+        """Return get_movie_data for the given movieID, using the rows
+        read in advance, if any."""
+        return get_movie_data(movieID, self._kind, fromAka,
+                                getRow=self._get_row)
+
+    def _prefetch_batch(self, prefix, mopIDs):
+        """Read in advance, with a few queries, all the rows needed to
+        build the objects of the given kind (prefix) and IDs."""
+        if prefix == 'movie':
+            for table in (MovieInfo, MovieInfoIdx, CompleteCast):
+                self._prefetch(table, 'movieID', mopIDs)
+            akas = self._prefetch(AkaTitle, 'movieID', mopIDs)
+            self._prefetch_titles(AkaTitle, [at.id for at in akas])
+            links = self._prefetch(MovieLink, 'movieID', mopIDs)
+            episodes = self._prefetch(Title, 'episodeOfID', mopIDs)
+            self._prefetch_titles(Title, list(mopIDs) +
+                                [ml.linkedMovieID for ml in links] +
+                                [ep.id for ep in episodes])
+            cast = self._prefetch(CastInfo, 'movieID', mopIDs)
+            self._prefetch(Name, 'id', [cd.personID for cd in cast])
+            self._prefetch(CharName, 'id', [cd.personRoleID for cd in cast])
+            keywords = self._prefetch(MovieKeyword, 'movieID', mopIDs)
+            self._prefetch(Keyword, 'id', [mk.keywordID for mk in keywords])
+            companies = self._prefetch(MovieCompanies, 'movieID', mopIDs)
+            self._prefetch(CompanyName, 'id',
+                            [mc.companyID for mc in companies])
+        elif prefix == 'person':
+            self._prefetch(Name, 'id', mopIDs)
+            self._prefetch(PersonInfo, 'personID', mopIDs)
+            self._prefetch(AkaName, 'personID', mopIDs)
+            cast = self._prefetch(CastInfo, 'personID', mopIDs)
+            self._prefetch(CharName, 'id', [cd.personRoleID for cd in cast])
+            self._prefetch_titles(Title, [cd.movieID for cd in cast])
+        elif prefix == 'character':
+            self._prefetch(CharName, 'id', mopIDs)
+            cast = self._prefetch(CastInfo, 'personRoleID', mopIDs)
+            self._prefetch(Name, 'id', [cd.personID for cd in cast])
+            self._prefetch_titles(Title, [cd.movieID for cd in cast])
+        elif prefix == 'company':
+            self._prefetch(CompanyName, 'id', mopIDs)
+            companies = self._prefetch(MovieCompanies, 'companyID', mopIDs)
+            self._prefetch_titles(Title, [mc.movieID for mc in companies])
+
+    def _prefetch_titles(self, table, movieIDs):
+        """Read in advance the rows of table (Title or AkaTitle) with the
+        given IDs, and the ones of the series of the episodes among them,
+        as used by get_movie_data."""
+        titles = self._prefetch(table, 'id', movieIDs)
+        seriesIDs = [t.episodeOfID for t in titles
+                    if t.episodeOfID is not None]
+        if seriesIDs:
+            self._prefetch(table, 'id', seriesIDs)
+
+    def _retrieve_many(self, prefix, mopIDs, info, modFunct):
+        """Iterate over the objects of the given kind (prefix) and IDs;
+        the rows needed by every _batchSize objects are read in advance,
+        with a query for every table instead of one for every object.
+        The rows are used only while the objects of the batch are built,
+        and not by other calls made between two of them."""
+        for start in xrange(0, len(mopIDs), self._batchSize):
+            batchIDs = mopIDs[start:start+self._batchSize]
+            batchRows = self._batchRows = {}
+            try:
+                self._prefetch_batch(prefix, batchIDs)
+                mops = IMDbBase._retrieve_many(self, prefix, batchIDs,
+                                                info, modFunct)
+            finally:
+                self._batchRows = {}
+            while True:
+                self._batchRows = batchRows
+                try:
+                    try:
+                        mop = mops.next()
+                    except StopIteration:
+                        break
+                finally:
+                    self._batchRows = {}
+                yield mop
+
     def _normalize_movieID(self, movieID):
         """Normalize the given movieID."""
         try:
@@ -1029,7 +1153,7 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Every movie information is retrieved from here.
         infosets = self.get_movie_infoset()
         try:
-            res = get_movie_data(movieID, self._kind)
+            res = self._movie_data(movieID)
         except NotFoundError, e:
             raise IMDbDataAccessError( \
                     'unable to get movieID "%s": "%s"' % (movieID, str(e)))
@@ -1038,9 +1162,9 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Collect cast information.
         castdata = [[cd.personID, cd.personRoleID, cd.note, cd.nrOrder,
                     self._role[cd.roleID]]
-                    for cd in CastInfo.select(CastInfo.q.movieID == movieID)]
+                    for cd in self._select_rows(CastInfo, 'movieID', movieID)]
         for p in castdata:
-            person = Name.get(p[0])
+            person = self._get_row(Name, p[0])
             p += [person.name, person.imdbIndex]
             if p[4] in ('actor', 'actress'):
                 p[4] = 'cast'
@@ -1052,7 +1176,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                 curRole = pdata[1]
                 curRoleID = None
                 if curRole is not None:
-                    robj = CharName.get(curRole)
+                    robj = self._get_row(CharName, curRole)
                     curRole = robj.name
                     curRoleID = robj.id
                 p = Person(personID=pdata[0], name=pdata[5],
@@ -1068,11 +1192,12 @@ class IMDbSqlAccessSystem(IMDbBase):
             res[duty].sort()
         # Info about the movie.
         minfo = [(self._info[m.infoTypeID], m.info, m.note)
-                for m in MovieInfo.select(MovieInfo.q.movieID == movieID)]
+                for m in self._select_rows(MovieInfo, 'movieID', movieID)]
         minfo += [(self._info[m.infoTypeID], m.info, m.note)
-                for m in MovieInfoIdx.select(MovieInfoIdx.q.movieID == movieID)]
-        minfo += [('keywords', Keyword.get(m.keywordID).keyword, None)
-                for m in MovieKeyword.select(MovieKeyword.q.movieID == movieID)]
+                for m in self._select_rows(MovieInfoIdx, 'movieID', movieID)]
+        minfo += [('keywords', self._get_row(Keyword, m.keywordID).keyword,
+                    None)
+                for m in self._select_rows(MovieKeyword, 'movieID', movieID)]
         minfo = _groupListBy(minfo, 0)
         for group in minfo:
             sect = group[0][0]
@@ -1082,12 +1207,12 @@ class IMDbSqlAccessSystem(IMDbBase):
                 res.setdefault(sect, []).append(data)
         # Companies info about a movie.
         cinfo = [(self._compType[m.companyTypeID], m.companyID, m.note) for m
-                in MovieCompanies.select(MovieCompanies.q.movieID == movieID)]
+                in self._select_rows(MovieCompanies, 'movieID', movieID)]
         cinfo = _groupListBy(cinfo, 0)
         for group in cinfo:
             sect = group[0][0]
             for mdata in group:
-                cDb = CompanyName.get(mdata[1])
+                cDb = self._get_row(CompanyName, mdata[1])
                 cDbTxt = cDb.name
                 if cDb.countryCode:
                     cDbTxt += ' %s' % cDb.countryCode
@@ -1097,8 +1222,8 @@ class IMDbSqlAccessSystem(IMDbBase):
                                 accessSystem=self.accessSystem)
                 res.setdefault(sect, []).append(company)
         # AKA titles.
-        akat = [(get_movie_data(at.id, self._kind, fromAka=1), at.note)
-                for at in AkaTitle.select(AkaTitle.q.movieID == movieID)]
+        akat = [(self._movie_data(at.id, fromAka=1), at.note)
+                for at in self._select_rows(AkaTitle, 'movieID', movieID)]
         if akat:
             res['akas'] = []
             for td, note in akat:
@@ -1110,17 +1235,17 @@ class IMDbSqlAccessSystem(IMDbBase):
                 if nt not in res['akas']: res['akas'].append(nt)
         # Complete cast/crew.
         compcast = [(self._compcast[cc.subjectID], self._compcast[cc.statusID])
-            for cc in CompleteCast.select(CompleteCast.q.movieID == movieID)]
+            for cc in self._select_rows(CompleteCast, 'movieID', movieID)]
         if compcast:
             for entry in compcast:
                 val = unicode(entry[1])
                 res[u'complete %s' % entry[0]] = val
         # Movie connections.
         mlinks = [[ml.linkedMovieID, self._link[ml.linkTypeID]]
-                    for ml in MovieLink.select(MovieLink.q.movieID == movieID)]
+                    for ml in self._select_rows(MovieLink, 'movieID', movieID)]
         if mlinks:
             for ml in mlinks:
-                lmovieData = get_movie_data(ml[0], self._kind)
+                lmovieData = self._movie_data(ml[0])
                 if lmovieData:
                     m = Movie(movieID=ml[0], data=lmovieData, accessSystem='sql')
                     ml[0] = m
@@ -1131,7 +1256,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                 res['connections'][lt] = [i[0] for i in group]
         # Episodes.
         episodes = {}
-        eps_list = list(Title.select(Title.q.episodeOfID == movieID))
+        eps_list = list(self._select_rows(Title, 'episodeOfID', movieID))
         eps_list.sort()
         if eps_list:
             ps_data = {'title': res['title'], 'kind': res['kind'],
@@ -1141,7 +1266,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                                 accessSystem='sql')
             for episode in eps_list:
                 episodeID = episode.id
-                episode_data = get_movie_data(episodeID, self._kind)
+                episode_data = self._movie_data(episodeID)
                 m = Movie(movieID=episodeID, data=episode_data,
                             accessSystem='sql')
                 m['episode of'] = parentSeries
@@ -1283,7 +1408,7 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Every person information is retrieved from here.
         infosets = self.get_person_infoset()
         try:
-            p = Name.get(personID)
+            p = self._get_row(Name, personID)
         except NotFoundError, e:
             raise IMDbDataAccessError( \
                     'unable to get personID "%s": "%s"' % (personID, str(e)))
@@ -1294,8 +1419,8 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Collect cast information.
         castdata = [(cd.movieID, cd.personRoleID, cd.note,
                     self._role[cd.roleID],
-                    get_movie_data(cd.movieID, self._kind))
-                for cd in CastInfo.select(CastInfo.q.personID == personID)]
+                    self._movie_data(cd.movieID))
+                for cd in self._select_rows(CastInfo, 'personID', personID)]
         # Regroup by role/duty (cast, writer, director, ...)
         castdata[:] =  _groupListBy(castdata, 3)
         episodes = {}
@@ -1313,7 +1438,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                 curRole = mdata[1]
                 curRoleID = None
                 if curRole is not None:
-                    robj = CharName.get(curRole)
+                    robj = self._get_row(CharName, curRole)
                     curRole = robj.name
                     curRoleID = robj.id
                 m = Movie(movieID=mdata[0], data=mdata[4],
@@ -1337,7 +1462,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                 res[duty].sort()
         # Info about the person.
         pinfo = [(self._info[pi.infoTypeID], pi.info, pi.note)
-                for pi in PersonInfo.select(PersonInfo.q.personID == personID)]
+                for pi in self._select_rows(PersonInfo, 'personID', personID)]
         # Regroup by duty.
         pinfo = _groupListBy(pinfo, 0)
         for group in pinfo:
@@ -1348,7 +1473,7 @@ class IMDbSqlAccessSystem(IMDbBase):
                 res.setdefault(sect, []).append(data)
         # AKA names.
         akan = [(an.name, an.imdbIndex)
-                for an in AkaName.select(AkaName.q.personID == personID)]
+                for an in self._select_rows(AkaName, 'personID', personID)]
         if akan:
             res['akas'] = []
             for n in akan:
@@ -1438,7 +1563,7 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Every character information is retrieved from here.
         infosets = self.get_character_infoset()
         try:
-            c = CharName.get(characterID)
+            c = self._get_row(CharName, characterID)
         except NotFoundError, e:
             raise IMDbDataAccessError( \
                     'unable to get characterID "%s": "%s"' % (characterID, e))
@@ -1448,11 +1573,11 @@ class IMDbSqlAccessSystem(IMDbBase):
             raise IMDbDataAccessError('unable to get characterID "%s"' % \
                                         characterID)
         # Collect filmography information.
-        items = CastInfo.select(CastInfo.q.personRoleID == characterID)
+        items = self._select_rows(CastInfo, 'personRoleID', characterID)
         if results > 0:
             items = items[:results]
         filmodata = [(cd.movieID, cd.personID, cd.note,
-                    get_movie_data(cd.movieID, self._kind)) for cd in items
+                    self._movie_data(cd.movieID)) for cd in items
                     if self._role[cd.roleID] in ('actor', 'actress')]
         fdata = []
         for f in filmodata:
@@ -1460,7 +1585,7 @@ class IMDbSqlAccessSystem(IMDbBase):
             curRoleID = f[1]
             note = f[2] or u''
             if curRoleID is not None:
-                robj = Name.get(curRoleID)
+                robj = self._get_row(Name, curRoleID)
                 curRole = robj.name
             m = Movie(movieID=f[0], data=f[3],
                         currentRole=curRole or u'',
@@ -1514,7 +1639,7 @@ class IMDbSqlAccessSystem(IMDbBase):
         # Every company information is retrieved from here.
         infosets = self.get_company_infoset()
         try:
-            c = CompanyName.get(companyID)
+            c = self._get_row(CompanyName, companyID)
         except NotFoundError, e:
             raise IMDbDataAccessError( \
                     'unable to get companyID "%s": "%s"' % (companyID, e))
@@ -1524,12 +1649,12 @@ class IMDbSqlAccessSystem(IMDbBase):
             raise IMDbDataAccessError('unable to get companyID "%s"' % \
                                         companyID)
         # Collect filmography information.
-        items = MovieCompanies.select(MovieCompanies.q.companyID == companyID)
+        items = self._select_rows(MovieCompanies, 'companyID', companyID)
         if results > 0:
             items = items[:results]
         filmodata = [(cd.movieID, cd.companyID,
                     self._compType[cd.companyTypeID], cd.note,
-                    get_movie_data(cd.movieID, self._kind)) for cd in items]
+                    self._movie_data(cd.movieID)) for cd in items]
         filmodata = _groupListBy(filmodata, 2)
         for group in filmodata:
             ctype = group[0][2]
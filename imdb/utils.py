@@ -24,7 +24,9 @@ Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 from __future__ import generators
 import re
 import string
+import time
 import logging
+import threading
 from copy import copy, deepcopy
 from time import strptime, strftime
 
@@ -1135,6 +1137,11 @@ class _Container(object):
     # The default sets of information retrieved.
     default_info = ()
 
+    # Named profiles that can be passed as the info argument of
+    # IMDbBase.update: a tuple of (info set, keys) pairs, to retrieve
+    # only the given keys of every set.
+    info_profiles = {}
+
     # Aliases for some not-so-intuitive keys.
     keys_alias = {}
 
@@ -1606,3 +1613,30 @@ def flatten(seq, toDescend=(list, dict, tuple), yieldDictKeys=0,
                     yield i
 
 
+
+
+class RateLimiter(object):
+    """Space the requests issued by all the threads sharing this
+    object, so that no more than rate requests per second are sent;
+    if rate is not set, requests are never delayed."""
+    def __init__(self, rate=None):
+        if rate:
+            self.interval = 1.0 / rate
+        else:
+            self.interval = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self, requests=1):
+        """Block until the given number of requests can be sent."""
+        if not self.interval:
+            return
+        self._lock.acquire()
+        try:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + requests * self.interval
+        finally:
+            self._lock.release()
+        if start > now:
+            time.sleep(start - now)
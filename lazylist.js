@@ -0,0 +1,139 @@
+// MyMoviePage lazy list, used by the pages written with --shard-size.
+//
+// The page loads the index written next to it, with the values of the
+// fields searched and sorted for every movie; the entries themselves are
+// in shards, loaded only when the entries are shown while scrolling.
+// Search and sort work on the index, without scanning the page.
+var MyMoviePage = (function() {
+  "use strict";
+
+  // entries added to the page at a time
+  var BATCH = 50;
+
+  var index = null,
+      entries = [],
+      view = [],
+      rendered = 0,
+      shards = {},
+      loading = {},
+      list = null,
+      query = '',
+      sortField = null,
+      sortAsc = true;
+
+  function shardOf(i) {
+    return Math.floor(i / index.shardSize);
+  }
+
+  function loadShard(n) {
+    if (shards[n] || loading[n]) return;
+    loading[n] = true;
+    var script = document.createElement('script');
+    script.src = index.base + index.shards[n];
+    document.body.appendChild(script);
+  }
+
+  function nearBottom() {
+    var scrolled = window.pageYOffset || document.documentElement.scrollTop;
+    return scrolled + 2 * window.innerHeight >= document.body.offsetHeight;
+  }
+
+  // add the next batch of entries, once all their shards are loaded;
+  // shard() calls it again when a missing shard arrives
+  function render() {
+    var end = Math.min(rendered + BATCH, view.length),
+        html = [],
+        missing = false,
+        i, n;
+    for (i = rendered; i < end; i++) {
+      n = shardOf(view[i]);
+      if (!shards[n]) {
+        loadShard(n);
+        missing = true;
+      }
+    }
+    if (missing || rendered >= end) return;
+    for (i = rendered; i < end; i++) {
+      html.push(shards[shardOf(view[i])][view[i] % index.shardSize]);
+    }
+    list.insertAdjacentHTML('beforeend', html.join(''));
+    rendered = end;
+    if (nearBottom()) render();
+  }
+
+  function compare(a, b) {
+    var na = parseFloat(a), nb = parseFloat(b);
+    if (!isNaN(na) && !isNaN(nb)) return na - nb;
+    if (!isNaN(na)) return -1;
+    if (!isNaN(nb)) return 1;
+    return String(a).localeCompare(String(b));
+  }
+
+  // rebuild the list of the entries matching the search, in sort order
+  function update() {
+    var i, field = sortField, dir = sortAsc ? 1 : -1;
+    view = [];
+    for (i = 0; i < entries.length; i++) {
+      if (!query || entries[i].text.indexOf(query) !== -1) view.push(i);
+    }
+    if (field !== null) {
+      view.sort(function(a, b) {
+        return dir * compare(entries[a].values[field], entries[b].values[field]) || a - b;
+      });
+    }
+    list.innerHTML = '';
+    rendered = 0;
+    render();
+  }
+
+  function setup() {
+    var root = document.getElementById('movies'),
+        search = root.getElementsByClassName('search')[0],
+        buttons = root.getElementsByClassName('sort'),
+        i;
+    list = root.getElementsByClassName('list')[0];
+    if (search) {
+      search.addEventListener('keyup', function() {
+        var value = search.value.toLowerCase();
+        if (value === query) return;
+        query = value;
+        update();
+      });
+    }
+    for (i = 0; i < buttons.length; i++) {
+      buttons[i].addEventListener('click', function() {
+        var field = index.fields.indexOf(this.getAttribute('data-sort')), j;
+        if (field === -1) return;
+        sortAsc = field === sortField ? !sortAsc : true;
+        sortField = field;
+        for (j = 0; j < buttons.length; j++) {
+          buttons[j].className = buttons[j].className.replace(/\s*\b(asc|desc)\b/g, '');
+        }
+        this.className += sortAsc ? ' asc' : ' desc';
+        update();
+      });
+    }
+    window.addEventListener('scroll', render);
+    window.addEventListener('resize', render);
+  }
+
+  return {
+    index: function(data) {
+      var i, values;
+      index = data;
+      for (i = 0; i < data.entries.length; i++) {
+        values = data.entries[i] || [];
+        // the search matches the sorted fields and the text field, with
+        // the directors, cast and plot
+        entries.push({values: values, text: values.join(' ').toLowerCase()});
+      }
+      setup();
+      update();
+    },
+    shard: function(n, data) {
+      shards[n] = data;
+      delete loading[n];
+      render();
+    }
+  };
+})();
@@ -1,51 +1,320 @@
 #!/usr/bin/env python
 
 import imdb
+from imdb.utils import RateLimiter
 import re
-from os import listdir, access, W_OK
-from os.path import isfile, isdir, dirname, abspath, join, getmtime
+import json
+from hashlib import md5, sha1
+import urllib2
+from os import listdir, access, rename, remove, stat, lstat, makedirs, W_OK
+from os.path import isfile, isdir, dirname, abspath, join, basename, splitext
+from stat import S_ISDIR, S_ISREG, S_ISLNK
 import logging as log
 from optparse import OptionParser
 from sys import exit
+from string import maketrans, ascii_uppercase, ascii_lowercase
+from time import time
+from threading import Lock, local
+from multiprocessing.pool import ThreadPool
 import shutil
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
 
 # globals
-ia = imdb.IMDb()
 file_ext = 'avi|divx|mkv|mpg|mp4|wmv|bin|ogm|vob|iso|img|bin|ts|rmvb|3gp|asf|flv|mov|movx|mpe|mpeg|mpg|mpv|ogg|ram|rm|wm|wmx|x264|xvid|dv|m4v'
 purge_words = 'divx|dvdscr|aac|dvdrip|brrip|UNRATED|WEBSCR|KLAXXON|xvid|r5|com--scOrp|300mbunited|1channel|3channel|bray|blueray|5channel|1GB|1080p|720p|480p|CD1|CD2|CD3|CD4|x264|x264-sUN|Special Edition|Sample|sample'
 CSS_FILE = 'mymoviepage.css'
 JS_FILE = 'list.js'
+LAZY_JS_FILE = 'lazylist.js'
 NOIMG = 'https://upload.wikimedia.org/wikipedia/commons/thumb/3/35/IMDb_logo.svg/200px-IMDb_logo.svg.png'
+# bump when the format of the dict returned by get_movie_info changes
+CACHE_VERSION = 1
+# bump when the format of the rendered entries changes
+MANIFEST_VERSION = 5
+# values of an entry searched and sorted by the page, as the sort buttons,
+# plus the text of the directors, cast and plot, only searched
+INDEX_FIELDS = ['title', 'genre', 'year', 'rating', 'text']
+DAY = 24 * 60 * 60
+# largest size of the cover thumbnails, twice the size shown by the page
+THUMB_SIZE = (240, 360)
+movie_extensions = frozenset('.' + ext for ext in file_ext.split('|'))
+# one IMDb instance per thread: its parsers are not thread safe
+_thread_data = local()
 
-def normalize_filename(movie_filename):
-    file_ext_expr = "(?P<name>.*)\.({0})".format(file_ext)
-    match = re.match(file_ext_expr, movie_filename, re.I)
-    if not match:
-        log.error('Cannot process filename {0}'.format(movie_filename))
-        return None
-    movie_filename = match.group('name')
+def utf8_keys(d):
+    """Encode back the keys of a dictionary read from a JSON file, which
+    come from (utf-8 encoded) filenames."""
+    return dict((k.encode('utf-8'), v) for k, v in d.iteritems())
+
+def get_ia():
+    try:
+        return _thread_data.ia
+    except AttributeError:
+        _thread_data.ia = imdb.IMDb()
+        return _thread_data.ia
+
+class _DirEntry(object):
+    """Minimal replacement of os.DirEntry, used when scandir is not
+    available; the stat result is cached like scandir does."""
+    def __init__(self, dirpath, name):
+        self.name = name
+        self.path = join(dirpath, name)
+        self._lstat = None
+        self._stat = None
+
+    def is_symlink(self):
+        if self._lstat is None:
+            self._lstat = lstat(self.path)
+        return S_ISLNK(self._lstat.st_mode)
+
+    def stat(self):
+        if self._stat is None:
+            if self.is_symlink():
+                self._stat = stat(self.path)
+            else:
+                self._stat = self._lstat
+        return self._stat
+
+    def is_dir(self):
+        return S_ISDIR(self.stat().st_mode)
+
+    def is_file(self):
+        return S_ISREG(self.stat().st_mode)
+
+def _scandir(path):
+    if scandir is not None:
+        return scandir(path)
+    return (_DirEntry(path, name) for name in listdir(path))
+
+def scan_movies(moviedir, recursive=True, extensions=movie_extensions):
+    """Yield (path relative to moviedir, size, mtime) for every movie file
+    in moviedir and, if recursive is set, in its subdirectories; files
+    with an unknown extension, hidden files and symlinked directories are
+    skipped.  Every entry is stat'ed at most once."""
+    pending = ['']
+    while pending:
+        reldir = pending.pop()
+        try:
+            entries = sorted(_scandir(join(moviedir, reldir)), key=lambda x: x.name)
+        except OSError:
+            log.error('Cannot read directory {0}'.format(join(moviedir, reldir)))
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            relpath = join(reldir, entry.name)
+            try:
+                if entry.is_dir():
+                    if recursive and not entry.is_symlink():
+                        subdirs.append(relpath)
+                    continue
+                if splitext(entry.name)[1].lower() not in extensions or \
+                        not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                log.error('Cannot stat file {0}'.format(join(moviedir, relpath)))
+                continue
+            yield relpath, st.st_size, st.st_mtime
+        # visit subdirectories in order, depth-first
+        pending.extend(reversed(subdirs))
+
+class FilenameNormalizer(object):
+    """Turn movie filenames into titles to search on IMDB.
+
+    The extension is stripped, everything from the first bracket, purge
+    word or 4-digit year on is cut away, dots and underscores become
+    spaces and hyphens and apostrophes are dropped.  The regular
+    expressions are compiled only once."""
+    def __init__(self, file_ext=file_ext, purge_words=purge_words):
+        self.re_file_ext = re.compile("(?P<name>.*)\.({0})".format(file_ext), re.I)
+        # matched against the lowercased name: much faster than re.I
+        self.re_cut = re.compile("\[|\(|{0}".format(purge_words.lower()))
+        self.re_digit = re.compile("\d{4}")
+        self.re_year = re.compile("(?<!\d)(1[89]\d\d|20\d\d)(?!\d)")
+        self._str_lower = maketrans(ascii_uppercase, ascii_lowercase)
+        self._str_table = maketrans('._', '  ')
+        self._unicode_lower = dict((ord(c), ord(c.lower())) for c in ascii_uppercase)
+        self._unicode_table = {ord(u'.'): u' ', ord(u'_'): u' ',
+                               ord(u'-'): None, ord(u"'"): None}
+
+    def normalize(self, movie_filename):
+        match = self.re_file_ext.match(movie_filename)
+        if not match:
+            log.error('Cannot process filename {0}'.format(movie_filename))
+            return None
+        name = match.group('name')
+        if isinstance(name, unicode):
+            lowered = name.translate(self._unicode_lower)
+        else:
+            lowered = name.translate(self._str_lower)
+        # a 4-digit year is searched only before the first bracket or
+        # purge word, since it may overlap the latter (e.g. '21080p')
+        cut = self.re_cut.search(lowered)
+        end = cut.start() if cut else len(name)
+        digit = self.re_digit.search(name, 0, end)
+        if digit:
+            end = digit.start()
+        name = name[:end]
+        if isinstance(name, unicode):
+            name = name.translate(self._unicode_table)
+        else:
+            name = name.translate(self._str_table, "-'")
+        return name.strip()
+
+    def title_year(self, movie_filename):
+        """Return the normalized title and the year found in the filename,
+        or None if there is no year."""
+        title = self.normalize(movie_filename)
+        if title is None:
+            return None, None
+        year = self.re_year.search(movie_filename)
+        return title, year and year.group(1)
+
+    def normalize_many(self, movie_filenames):
+        """Return the list of the normalized titles of the given filenames,
+        None for the ones that can't be processed."""
+        normalize = self.normalize
+        return [normalize(f) for f in movie_filenames]
+
+normalizer = FilenameNormalizer()
+normalize_filename = normalizer.normalize
+
+class MovieCache(object):
+    """Persistent cache of the information retrieved from IMDB.
+
+    Normalized filenames are mapped to movieIDs, and movieIDs to the
+    dictionaries returned by get_movie_info; every entry expires after
+    ttl seconds, and only the maxsize most recently used movies are kept."""
+    def __init__(self, cachefile, ttl=30*DAY, maxsize=20000,
+                 refresh_older_than=None):
+        self.cachefile = cachefile
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.refresh_older_than = refresh_older_than
+        self.files = {}
+        self.movies = {}
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cachefile) as f:
+                data = json.load(f)
+        except:
+            # missing or corrupted cache file, start from scratch
+            return
+        if data.get('version') != CACHE_VERSION:
+            log.info('Discarding cache {0} with obsolete format'.format(self.cachefile))
+            return
+        self.files = utf8_keys(data.get('files', {}))
+        self.movies = data.get('movies', {})
+
+    def _evict(self):
+        if len(self.movies) > self.maxsize:
+            by_access = sorted(self.movies, key=lambda x: self.movies[x]['accessed'])
+            for movieID in by_access[:len(self.movies)-self.maxsize]:
+                del self.movies[movieID]
+        for filename in self.files.keys():
+            movieID = self.files[filename]['movieID']
+            if movieID is not None and movieID not in self.movies:
+                del self.files[filename]
+        if len(self.files) > self.maxsize:
+            by_access = sorted(self.files, key=lambda x: self.files[x]['accessed'])
+            for filename in by_access[:len(self.files)-self.maxsize]:
+                del self.files[filename]
+
+    def save(self):
+        with self._lock:
+            self._evict()
+            data = {'version': CACHE_VERSION,
+                    'files': self.files,
+                    'movies': self.movies}
+            tmpfile = self.cachefile + '.tmp'
+        try:
+            with open(tmpfile, 'w') as f:
+                json.dump(data, f)
+            rename(tmpfile, self.cachefile)
+        except:
+            log.error('Cannot write cache file {0}'.format(self.cachefile))
+
+    def _valid(self, entry):
+        now = time()
+        if now > entry['expires']:
+            return False
+        if self.refresh_older_than is not None and \
+                now - entry['fetched'] > self.refresh_older_than:
+            return False
+        entry['accessed'] = now
+        return True
 
-    purge_words_list = "(?i)({0})(.*)$".format(purge_words)
-    purge_digit = "(\d{4})(.*)$"
-    purge_spl_chars = "(\[|\()(.*)$"
-    purge_dot_underscore = "(\.|_)"
-    purge_hypen_aps = "(\-|')"
+    def _entry(self, **kwds):
+        now = time()
+        kwds.update({'fetched': now, 'accessed': now, 'expires': now + self.ttl})
+        return kwds
 
-    re_str = re.sub(purge_spl_chars, "", movie_filename, )
-    re_str = re.sub(purge_words_list, "", re_str, re.I)
-    re_str = re.sub(purge_digit, "", re_str, )
-    re_str = re.sub(purge_dot_underscore, " ", re_str, )
-    re_str = re.sub(purge_hypen_aps, "", re_str, )
+    def get(self, filename_normalized):
+        """Return the cached movie information for a normalized filename,
+        None if the movie is known not to be on IMDB; raise KeyError when
+        the file is not in the cache or its entry is stale."""
+        with self._lock:
+            entry = self.files.get(filename_normalized)
+            if entry is None or not self._valid(entry):
+                raise KeyError(filename_normalized)
+            movieID = entry['movieID']
+            if movieID is None:
+                return None
+            movie_entry = self.movies.get(movieID)
+            if movie_entry is None or not self._valid(movie_entry):
+                raise KeyError(filename_normalized)
+            return movie_entry['info']
 
-    return re_str.rstrip().lstrip()
+    def get_movie(self, movieID):
+        """Return the cached information for a movieID, or None."""
+        with self._lock:
+            movie_entry = self.movies.get(movieID)
+            if movie_entry is None or not self._valid(movie_entry):
+                return None
+            return movie_entry['info']
 
-def get_movie_info(filename):
-    filename_normalized = normalize_filename(filename)
+    def set(self, filename_normalized, movieinfo):
+        with self._lock:
+            if movieinfo is None:
+                self.files[filename_normalized] = self._entry(movieID=None)
+                return
+            movieID = movieinfo['movieID']
+            self.files[filename_normalized] = self._entry(movieID=movieID)
+            self.movies[movieID] = self._entry(info=movieinfo)
+
+def get_movie_info(filename, cache=None, limiter=None):
+    filename_normalized = normalize_filename(basename(filename))
     if not(filename_normalized):
         log.error('Could not normalize filename {0}'.format(filename))
         return None
 
+    if cache is not None:
+        try:
+            movieinfo = cache.get(filename_normalized)
+            log.info('Using cached info for file {0}'.format(filename))
+            return movieinfo
+        except KeyError:
+            pass
+
+    ia = get_ia()
+
     # search IMDB
+    if limiter is not None:
+        limiter.wait()
     result = ia.search_movie(filename_normalized)
 
     # select the first retrieved movie
@@ -53,11 +322,22 @@ def get_movie_info(filename):
         movie = result[0]
     except:
         log.error('No movie found for file {0}'.format(filename))
+        if cache is not None:
+            cache.set(filename_normalized, None)
         return None
 
-    # retrieve information
+    # another file may have already fetched the same movie
+    if cache is not None:
+        movieinfo = cache.get_movie(movie.movieID)
+        if movieinfo is not None:
+            cache.set(filename_normalized, movieinfo)
+            return movieinfo
+
+    # retrieve only the information shown in the page
+    if limiter is not None:
+        limiter.wait(len(movie.info_profiles['page fields']))
     try:
-        ia.update(movie)
+        ia.update(movie, 'page fields')
     except:
         log.error('Error contacting IMDB API')
         return None
@@ -96,20 +376,22 @@ def get_movie_info(filename):
     except:
         cover = NOIMG
 
-    return {'title': title,
-            'directors': directors,
-            'cast': cast,
-            'plot': plot,
-            'year': year,
-            'genre': genre,
-            'rating': rating,
-            'movieID':movieID,
-            'cover':cover,
-            }
-
-def writehtmlheader(pagefile):
-    with open(pagefile, 'w') as f:
-        f.write(u"""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+    movieinfo = {'title': title,
+                 'directors': directors,
+                 'cast': cast,
+                 'plot': plot,
+                 'year': year,
+                 'genre': genre,
+                 'rating': rating,
+                 'movieID':movieID,
+                 'cover':cover,
+                 }
+    if cache is not None:
+        cache.set(filename_normalized, movieinfo)
+    return movieinfo
+
+def htmlheader():
+    return u"""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
 <html xmlns="http://www.w3.org/1999/xhtml">
     <head>
         <link rel="stylesheet" type="text/css" href="{0}" />
@@ -127,15 +409,42 @@ def writehtmlheader(pagefile):
           <button class="sort" data-sort="year">Sort by year</button>
           <button class="sort" data-sort="rating">Sort by rating</button>
         </div>
-          <ul class="list">""".format(CSS_FILE).encode('utf-8'))
+          <ul class="list">""".format(CSS_FILE)
 
-def writehtmlfooter(pagefile):
-    with open(pagefile, 'a') as f:
-        f.write(u"""</ul>
+def htmlfooter(scripts=(JS_FILE,)):
+    return u"""</ul>
     </div>
-    <script src="{0}"></script>
-    </body>
-</html>""".format(JS_FILE).encode('utf-8'))
+{0}    </body>
+</html>""".format(u''.join(u'    <script src="{0}"></script>\n'.format(script)
+                           for script in scripts))
+
+def is_sample(moviefile):
+    return 'sample' in basename(moviefile).lower()
+
+def group_movies(moviefiles):
+    """Group the movie files with the same normalized title and year, like
+    the parts of a movie and its samples, so that they are looked up and
+    listed only once; return a list of (key, files) in the order the
+    files are found."""
+    groups = {}
+    keys = []
+    for moviefile in moviefiles:
+        title, year = normalizer.title_year(basename(moviefile))
+        if title:
+            key = '%s|%s' % (' '.join(title.lower().split()), year or '')
+        else:
+            # can't be grouped, let get_movie_info report the error
+            key = moviefile
+        if key not in groups:
+            groups[key] = []
+            keys.append(key)
+        groups[key].append(moviefile)
+    return [(key, groups[key]) for key in keys]
+
+def main_file(moviefiles):
+    """Return the file used to look up a group: the first one which
+    doesn't look like a sample."""
+    return min(moviefiles, key=is_sample)
 
 def personlink(person):
     try:
@@ -144,98 +453,620 @@ def personlink(person):
         link = u'{0}'.format(person['name'])
     return link
 
-def writehtmlentry(pagefile, movieinfo):
-    with open(pagefile, 'a') as f:
-        f.write(u'<li class="movie">\n')
-        f.write(u'<a href="http://www.imdb.com/title/tt{0}"><img class="cover"src="{1}" /></a>\n'.format(movieinfo['movieID'], movieinfo['cover']).encode('utf-8'))
-        f.write(u'<h1 class="title"><a href="http://www.imdb.com/title/tt{0}">{1}</a></h1>\n'.format(movieinfo['movieID'], movieinfo['title']).encode('utf-8'))
-        if len(movieinfo['directors'])>0:
-            f.write(u'<h2>by {0} (<span class="year">{1}</span>)</h2>\n'.format(u', '.join(map(personlink, movieinfo['directors'])), movieinfo['year']).encode('utf-8'))
-        f.write(u'<span class="genre">{0}</span>\n'.format(movieinfo['genre']).encode('utf-8'))
-        f.write(u'<span class="plot">{0}</span>\n'.format(movieinfo['plot']).encode('utf-8'))
-        if len(movieinfo['cast'])>0:
-            f.write(u'<span class="cast">With {0}.</span>\n'.format(u', '.join(map(personlink, movieinfo['cast'][:4]))).encode('utf-8'))
-        f.write(u'<span class="rating">IMDB Rating: {0}</span>\n'.format(movieinfo['rating']))
-        f.write(u'</li>\n')
-
-def writehtmlpage(moviefiles, pagefile):
-    writehtmlheader(pagefile)
-    for moviefile in moviefiles:
-        log.info('Getting info for movie {0}'.format(moviefile))
-        movieinfo = get_movie_info(moviefile)
-        if movieinfo:
-            writehtmlentry(pagefile, movieinfo)
-    writehtmlfooter(pagefile)
-
-# main
-# parse command line options
-parser = OptionParser()
-parser.add_option('-d',
-                  '--moviedir',
-                  dest='moviedir',
-                  help='Movie file directory. Default: .',
-                  default='.')
-parser.add_option('-p',
-                  '--pagefile',
-                  dest='pagefile',
-                  help='HTML output file. Default: mymoviepage.html',
-                  default='mymoviepage.html')
-parser.add_option('-l',
-                  '--logfile',
-                  dest='logfile',
-                  help='log file. Default: mymoviepage.log',
-                  default='mymoviepage.log')
-parser.add_option('-f',
-                  '--force',
-                  dest='force',
-                  action='store_true',
-                  help='Generate HTML regardless of timestampsself.',
-                  default=False)
-
-(options, args) = parser.parse_args()
-
-target_dir = dirname(abspath(options.pagefile))
-log_dir = dirname(abspath(options.logfile))
-if not isdir(options.moviedir):
-    log.error('{0} is not a valid directory, exiting.'.format(options.moviedir))
-    exit(1)
-if not access(target_dir, W_OK):
-    log.error('{0} is not writable, exiting.'.format(target_dir))
-    exit(1)
-if not access(log_dir, W_OK):
-    log.error('{0} is not writable, exiting.'.format(log_dir))
-    exit(1)
-
-log.basicConfig(filename=options.logfile,
-                level=log.INFO,
-                format='%(asctime)s %(message)s')
-
-# read movie file listdir
-log.info('Reading file list from directory {0}'.format(options.moviedir))
-moviefiles = [f for f in listdir(options.moviedir) if isfile(join(options.moviedir, f))]
-
-# check if there are new movie files
-try:
-    last_update_movies = max(map(lambda x: getmtime(join(options.moviedir, x)), moviefiles))
-except:
-    last_update_movies = 0
+def filelabel(moviefile):
+    label = basename(moviefile)
+    if isinstance(label, str):
+        label = label.decode('utf-8', 'replace')
+    return label
 
-try:
-    last_update_pagefile = getmtime(options.pagefile)
-except:
-    # HTML file does not exist or it is not writeable
-    last_update_pagefile = 0
-
-# generate HTML file
-if last_update_movies > last_update_pagefile or options.force:
-    log.info('Found new movies in directory {0}'.format(options.moviedir))
-    writehtmlpage(moviefiles, options.pagefile)
-else:
-    log.info('No movie found newer than the last update, nothing to do.')
-
-# copy static files
-for static_file in [CSS_FILE, JS_FILE]:
-    try:
-        shutil.copy(static_file, target_dir)
+def htmlentry(movieinfo, moviefiles=()):
+    entry = [u'<li class="movie">\n']
+    entry.append(u'<a href="http://www.imdb.com/title/tt{0}"><img class="cover"src="{1}" /></a>\n'.format(movieinfo['movieID'], movieinfo['cover']))
+    entry.append(u'<h1 class="title"><a href="http://www.imdb.com/title/tt{0}">{1}</a></h1>\n'.format(movieinfo['movieID'], movieinfo['title']))
+    if len(movieinfo['directors'])>0:
+        entry.append(u'<h2>by {0} (<span class="year">{1}</span>)</h2>\n'.format(u', '.join(map(personlink, movieinfo['directors'])), movieinfo['year']))
+    entry.append(u'<span class="genre">{0}</span>\n'.format(movieinfo['genre']))
+    entry.append(u'<span class="plot">{0}</span>\n'.format(movieinfo['plot']))
+    if len(movieinfo['cast'])>0:
+        entry.append(u'<span class="cast">With {0}.</span>\n'.format(u', '.join(map(personlink, movieinfo['cast'][:4]))))
+    entry.append(u'<span class="rating">IMDB Rating: {0}</span>\n'.format(movieinfo['rating']))
+    if len(moviefiles)>1:
+        entry.append(u'<span class="parts">Files: {0}</span>\n'.format(u', '.join(map(filelabel, moviefiles))))
+    entry.append(u'</li>\n')
+    return u''.join(entry)
+
+def indexfields(movieinfo):
+    """Return the values of INDEX_FIELDS for a movie, as shown by its
+    entry."""
+    names = [person['name'] for person in movieinfo['directors'] + movieinfo['cast'][:4]]
+    text = u' '.join(names + [u'{0}'.format(movieinfo['plot'])])
+    return [movieinfo[field] for field in INDEX_FIELDS[:-1]] + [text]
+
+class PageWriter(object):
+    """Write the HTML page through a single buffered file handle.
+
+    The page is written to a temporary file, renamed over pagefile only
+    when completed, so that readers never see a partial page."""
+    def __init__(self, pagefile, bufsize=1024*1024):
+        self.pagefile = pagefile
+        self.tmpfile = pagefile + '.tmp'
+        self.bufsize = bufsize
+        self.entries = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        self._start = time()
+        self._f = open(self.tmpfile, 'wb', self.bufsize)
+        self._write(htmlheader())
+        return self
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self._f.write(data)
+        self.bytes += len(data)
+
+    def write_entry(self, entry, fields=None):
+        self._write(entry)
+        self.entries += 1
+
+    def _done(self):
+        elapsed = max(time() - self._start, 1e-6)
+        log.info('Wrote {0} entries ({1} bytes) to {2} in {3:.2f}s: {4:.1f} entries/s, {5:.0f} bytes/s'.format(
+                 self.entries, self.bytes, self.pagefile, elapsed,
+                 self.entries / elapsed, self.bytes / elapsed))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._f.close()
+            remove(self.tmpfile)
+            return False
+        self._write(htmlfooter())
+        self._f.close()
+        rename(self.tmpfile, self.pagefile)
+        self._done()
+        return False
+
+class ShardWriter(PageWriter):
+    """Write the entries in shards of shard_size entries, plus an index
+    with the INDEX_FIELDS of every entry; the page only holds the controls
+    and loads the index, while LAZY_JS_FILE searches and sorts the index
+    and fetches the shards of the entries shown while scrolling.
+
+    Shards and index are JSON documents wrapped in a call to the page
+    script, so that they can be loaded with script tags also when the page
+    is opened from the filesystem. Every run writes them in a new
+    directory, removing the older ones only after the new page is in
+    place, so that readers never mix old and new data."""
+    def __init__(self, pagefile, shard_size=500, bufsize=1024*1024):
+        PageWriter.__init__(self, pagefile, bufsize)
+        self.shard_size = max(shard_size, 1)
+        self.datadir = splitext(pagefile)[0] + '_data'
+        self.stamp = '{0:x}'.format(int(time() * 1000))
+        self.shards = []
+        self._shard = []
+        self._index = []
+
+    def __enter__(self):
+        self._start = time()
+        self.shardir = join(self.datadir, self.stamp)
+        makedirs(self.shardir)
+        return self
+
+    def _dump(self, name, call, *args):
+        text = '{0}({1});\n'.format(call, ','.join(json.dumps(arg, separators=(',', ':'))
+                                                     for arg in args))
+        with open(join(self.shardir, name), 'wb', self.bufsize) as f:
+            f.write(text)
+        self.bytes += len(text)
+
+    def _flush(self):
+        shard = len(self.shards)
+        name = 'shard{0:05d}.js'.format(shard)
+        self._dump(name, 'MyMoviePage.shard', shard, self._shard)
+        self.shards.append(name)
+        self._shard = []
+
+    def write_entry(self, entry, fields=None):
+        self._shard.append(entry)
+        self._index.append(fields)
+        self.entries += 1
+        if len(self._shard) >= self.shard_size:
+            self._flush()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            shutil.rmtree(self.shardir, ignore_errors=True)
+            return False
+        if self._shard:
+            self._flush()
+        base = '{0}/{1}/'.format(basename(self.datadir), self.stamp)
+        self._dump('index.js', 'MyMoviePage.index',
+                   {'base': base, 'shardSize': self.shard_size,
+                    'shards': self.shards, 'fields': INDEX_FIELDS,
+                    'entries': self._index})
+        with open(self.tmpfile, 'wb') as f:
+            for text in (htmlheader(), htmlfooter((LAZY_JS_FILE, base + 'index.js'))):
+                data = text.encode('utf-8')
+                f.write(data)
+                self.bytes += len(data)
+        rename(self.tmpfile, self.pagefile)
+        for name in listdir(self.datadir):
+            if name != self.stamp:
+                shutil.rmtree(join(self.datadir, name), ignore_errors=True)
+        self._done()
+        return False
+
+class CoverMirror(object):
+    """Content-addressed local store of the cover images.
+
+    Every cover is stored once under objects/, named after the SHA-1 of
+    its content, and index.json maps the SHA-1 of its source URL to it,
+    so that the URLs already stored are never downloaded again; if PIL is
+    available, thumbnails no larger than size are kept under thumbs/.
+
+    Covers are downloaded by up to jobs threads into partial/, and an
+    interrupted download is resumed with a Range request by the next run.
+    Links are relative to the directory of the page, where the store is
+    placed in coverdir."""
+    def __init__(self, pagedir, coverdir='covers', size=THUMB_SIZE, jobs=4):
+        self.coverdir = coverdir
+        self.root = join(pagedir, coverdir)
+        self.indexfile = join(self.root, 'index.json')
+        self.size = size
+        self.jobs = jobs
+        self.index = {}
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.indexfile) as f:
+                self.index = json.load(f)
+        except:
+            self.index = {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.index)
+        tmpfile = self.indexfile + '.tmp'
+        try:
+            with open(tmpfile, 'w') as f:
+                f.write(data)
+            rename(tmpfile, self.indexfile)
+        except:
+            log.error('Cannot write cover index {0}'.format(self.indexfile))
+
+    def _path(self, *parts):
+        path = join(self.root, *parts)
+        if not isdir(dirname(path)):
+            try:
+                makedirs(dirname(path))
+            except OSError:
+                # created by another thread
+                pass
+        return path
+
+    def _object(self, name):
+        return ('objects', name[:2], name)
+
+    def _thumb(self, name):
+        return ('thumbs', '{0}x{1}'.format(*self.size), name[:2],
+                splitext(name)[0] + '.jpg')
+
+    def _stored(self, url):
+        with self._lock:
+            name = self.index.get(sha1(url.encode('utf-8')).hexdigest())
+        if name and isfile(join(self.root, *self._object(name))):
+            return name
+        return None
+
+    def local(self, url):
+        """Return the link to the local copy of the cover at url, the
+        thumbnail if any, or None if it is not stored."""
+        name = self._stored(url)
+        if name is None:
+            return None
+        for parts in (self._thumb(name), self._object(name)):
+            if isfile(join(self.root, *parts)):
+                return '/'.join((self.coverdir,) + parts)
+
+    def _download(self, url, partfile):
+        request = urllib2.Request(url)
+        try:
+            done = stat(partfile).st_size
+        except OSError:
+            done = 0
+        if done:
+            request.add_header('Range', 'bytes={0}-'.format(done))
+        try:
+            response = urllib2.urlopen(request, timeout=30)
+        except urllib2.HTTPError, e:
+            if done and e.code == 416:
+                # the part file is complete, but was not renamed
+                e.close()
+                return
+            raise
+        try:
+            # a server ignoring the Range header sends the whole image
+            mode = 'ab' if response.getcode() == 206 else 'wb'
+            with open(partfile, mode) as f:
+                shutil.copyfileobj(response, f)
+        finally:
+            response.close()
+
+    def fetch(self, url):
+        """Store the cover at url and its thumbnail, if not stored yet;
+        return True if it is stored."""
+        name = self._stored(url)
+        if name is None:
+            urlhash = sha1(url.encode('utf-8')).hexdigest()
+            try:
+                partfile = self._path('partial', urlhash + '.part')
+                try:
+                    self._download(url, partfile)
+                except Exception, e:
+                    log.error('Cannot download cover {0}: {1}'.format(url, e))
+                    return False
+                with open(partfile, 'rb') as f:
+                    data = f.read()
+                name = sha1(data).hexdigest() + imageext(data, url)
+                objfile = self._path(*self._object(name))
+                if isfile(objfile):
+                    # same image at another URL
+                    remove(partfile)
+                else:
+                    rename(partfile, objfile)
+            except (IOError, OSError), e:
+                log.error('Cannot store cover {0}: {1}'.format(url, e))
+                return False
+            with self._lock:
+                self.index[urlhash] = name
+        if Image is not None:
+            self._thumbnail(name)
+        return True
+
+    def _thumbnail(self, name):
+        thumbfile = self._path(*self._thumb(name))
+        if isfile(thumbfile):
+            return
+        try:
+            image = Image.open(join(self.root, *self._object(name)))
+            image.thumbnail(self.size, Image.ANTIALIAS)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(thumbfile + '.tmp', 'JPEG', quality=85)
+            rename(thumbfile + '.tmp', thumbfile)
+        except Exception, e:
+            log.error('Cannot make thumbnail of cover {0}: {1}'.format(name, e))
+
+    def fetch_many(self, urls):
+        """Store the covers at the given URLs, the index being saved every
+        checkpoint covers so that an interrupted run loses little work."""
+        urls = set(urls)
+        if Image is None:
+            log.warning('PIL not available, linking full size covers')
+        start = time()
+        stored = 0
+        checkpoint = 50
+        pool = ThreadPool(self.jobs)
+        try:
+            for i, ok in enumerate(pool.imap_unordered(self.fetch, urls)):
+                stored += ok
+                if i % checkpoint == checkpoint - 1:
+                    self.save()
+        finally:
+            pool.terminate()
+            self.save()
+        log.info('Stored {0} of {1} covers in {2} in {3:.2f}s'.format(
+                 stored, len(urls), self.root, time() - start))
+
+def imageext(data, url):
+    """Return the extension of an image, guessed from its first bytes or
+    else from its URL."""
+    for magic, ext in (('\xff\xd8', '.jpg'), ('\x89PNG', '.png'),
+                       ('GIF8', '.gif')):
+        if data.startswith(magic):
+            return ext
+    return splitext(url.split('?')[0])[1].lower()[:5] or '.img'
+
+def entryhash(entry):
+    return md5(entry.encode('utf-8')).hexdigest()
+
+def set_cover(entry, src):
+    """Point a rendered entry of the manifest to the cover image at src."""
+    if entry['src'] != src:
+        entry['entry'] = entry['entry'].replace(u'src="{0}"'.format(entry['src']),
+                                                u'src="{0}"'.format(src))
+        entry['src'] = src
+        entry['hash'] = entryhash(entry['entry'])
+
+def load_manifest(manifestfile):
+    """Return the entries of the manifest written by the previous run,
+    mapping every group of movie files to the size and mtime of its files,
+    its movieID and its rendered entry."""
+    try:
+        with open(manifestfile) as f:
+            manifest = json.load(f)
+    except:
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        log.info('Discarding manifest {0} with obsolete format'.format(manifestfile))
+        return {}
+    entries = utf8_keys(manifest.get('entries', {}))
+    for entry in entries.itervalues():
+        entry['files'] = utf8_keys(entry['files'])
+    return entries
+
+def save_manifest(manifestfile, entries):
+    tmpfile = manifestfile + '.tmp'
+    try:
+        with open(tmpfile, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': entries}, f)
+        rename(tmpfile, manifestfile)
     except:
-        log.error('Cannot copy style file {0} in {1}'.format(static_file, target_dir))
+        log.error('Cannot write manifest file {0}'.format(manifestfile))
+
+def group_signature(moviefiles, signatures):
+    return dict((f, list(signatures[f])) for f in moviefiles)
+
+def unchanged(manifest, key, moviefiles, signatures):
+    try:
+        old = manifest[key]
+    except KeyError:
+        return False
+    # A failed lookup (with an empty entry) is always retried: the movies
+    # not found on IMDB are cached anyway.
+    return bool(old['entry']) and \
+           old['files'] == group_signature(moviefiles, signatures) and \
+           entryhash(old['entry']) == old['hash']
+
+def changed_groups(groups, signatures, manifest):
+    """Return the keys of the groups of movie files added or modified since
+    the manifest was written, and the ones of the groups removed."""
+    changed = [k for k, files in groups if not unchanged(manifest, k, files, signatures)]
+    keys = set(k for k, files in groups)
+    removed = [k for k in manifest if k not in keys]
+    return changed, removed
+
+def lookup_movies(moviefiles, cache=None, jobs=1, limiter=None):
+    """Return an iterator over the information of the given movie files,
+    in the same order, retrieving up to jobs movies at the same time."""
+    def lookup(moviefile):
+        log.info('Getting info for movie {0}'.format(moviefile))
+        return get_movie_info(moviefile, cache, limiter)
+    if jobs <= 1:
+        for moviefile in moviefiles:
+            yield lookup(moviefile)
+        return
+    pool = ThreadPool(jobs)
+    try:
+        for movieinfo in pool.imap(lookup, moviefiles):
+            yield movieinfo
+    finally:
+        pool.terminate()
+
+def writehtmlpage(groups, pagefile, signatures, manifest=None, cache=None,
+                  jobs=1, limiter=None, shard_size=0, mirror=None):
+    """Write the page, looking up and rendering only the groups of movie
+    files that are not in the manifest with the same files, sizes and
+    mtimes; return the entries of the new manifest.
+
+    With a shard_size, write the entries in shards loaded lazily by the
+    page (see ShardWriter); with a CoverMirror, store the covers locally
+    and point the entries to them."""
+    if manifest is None:
+        manifest = {}
+    changed = [main_file(files) for key, files in groups
+               if not unchanged(manifest, key, files, signatures)]
+    movieinfos = lookup_movies(changed, cache, jobs, limiter)
+    entries = {}
+    for key, moviefiles in groups:
+        if unchanged(manifest, key, moviefiles, signatures):
+            entries[key] = manifest[key]
+        else:
+            movieinfo = next(movieinfos)
+            if movieinfo:
+                movieID = movieinfo['movieID']
+                entry = htmlentry(movieinfo, moviefiles)
+                fields = indexfields(movieinfo)
+                cover = movieinfo['cover']
+            else:
+                movieID = None
+                entry = u''
+                fields = None
+                cover = None
+            entries[key] = {'files': group_signature(moviefiles, signatures),
+                            'movieID': movieID,
+                            'hash': entryhash(entry),
+                            'entry': entry,
+                            'fields': fields,
+                            'cover': cover,
+                            'src': cover}
+    if mirror is not None:
+        mirror.fetch_many(entry['cover'] for entry in entries.itervalues()
+                          if entry['cover'])
+    if shard_size:
+        writer = ShardWriter(pagefile, shard_size)
+    else:
+        writer = PageWriter(pagefile)
+    with writer as page:
+        for key, moviefiles in groups:
+            entry = entries[key]
+            if not entry['entry']:
+                continue
+            if mirror is not None:
+                set_cover(entry, mirror.local(entry['cover']) or entry['cover'])
+            else:
+                set_cover(entry, entry['cover'])
+            page.write_entry(entry['entry'], entry['fields'])
+    return entries
+
+def main():
+    # parse command line options
+    parser = OptionParser()
+    parser.add_option('-d',
+                      '--moviedir',
+                      dest='moviedir',
+                      help='Movie file directory. Default: .',
+                      default='.')
+    parser.add_option('-p',
+                      '--pagefile',
+                      dest='pagefile',
+                      help='HTML output file. Default: mymoviepage.html',
+                      default='mymoviepage.html')
+    parser.add_option('-l',
+                      '--logfile',
+                      dest='logfile',
+                      help='log file. Default: mymoviepage.log',
+                      default='mymoviepage.log')
+    parser.add_option('-f',
+                      '--force',
+                      dest='force',
+                      action='store_true',
+                      help='Generate HTML regardless of timestampsself.',
+                      default=False)
+    parser.add_option('-n',
+                      '--no-recursive',
+                      dest='recursive',
+                      action='store_false',
+                      help='Do not look for movies in the subdirectories of the movie directory.',
+                      default=True)
+    parser.add_option('-j',
+                      '--jobs',
+                      dest='jobs',
+                      type='int',
+                      help='Number of movies looked up at the same time. Default: 1',
+                      default=1)
+    parser.add_option('-r',
+                      '--rate',
+                      dest='rate',
+                      type='float',
+                      help='Maximum number of requests per second to IMDB, 0 for no limit. Default: 0',
+                      default=0)
+    parser.add_option('-m',
+                      '--manifest',
+                      dest='manifest',
+                      help='Manifest of the movies in the HTML file. Default: PAGEFILE.manifest',
+                      default=None)
+    parser.add_option('-c',
+                      '--cachefile',
+                      dest='cachefile',
+                      help='IMDB information cache file. Default: mymoviepage.cache',
+                      default='mymoviepage.cache')
+    parser.add_option('--no-cache',
+                      dest='nocache',
+                      action='store_true',
+                      help='Do not read nor write the cache file.',
+                      default=False)
+    parser.add_option('--cache-ttl',
+                      dest='cachettl',
+                      type='float',
+                      help='Days after which cached information expires. Default: 30',
+                      default=30)
+    parser.add_option('--cache-size',
+                      dest='cachesize',
+                      type='int',
+                      help='Maximum number of movies kept in the cache. Default: 20000',
+                      default=20000)
+    parser.add_option('--refresh-older-than',
+                      dest='refresholderthan',
+                      type='float',
+                      help='Fetch again cached information older than this many days.',
+                      default=None)
+    parser.add_option('-s',
+                      '--shard-size',
+                      dest='shardsize',
+                      type='int',
+                      help='Write the movies in data files of this many entries, loaded by the page while scrolling, for very large libraries. Default: 0, all the movies in the HTML file',
+                      default=0)
+    parser.add_option('--mirror-covers',
+                      dest='mirrorcovers',
+                      action='store_true',
+                      help='Download the covers and link local thumbnails instead of the IMDB images.',
+                      default=False)
+    parser.add_option('--covers-dir',
+                      dest='coversdir',
+                      help='Directory of the local covers, relative to the HTML file directory. Default: covers',
+                      default='covers')
+    parser.add_option('--cover-jobs',
+                      dest='coverjobs',
+                      type='int',
+                      help='Number of covers downloaded at the same time. Default: 4',
+                      default=4)
+
+    (options, args) = parser.parse_args()
+
+    target_dir = dirname(abspath(options.pagefile))
+    log_dir = dirname(abspath(options.logfile))
+    if not isdir(options.moviedir):
+        log.error('{0} is not a valid directory, exiting.'.format(options.moviedir))
+        exit(1)
+    if not access(target_dir, W_OK):
+        log.error('{0} is not writable, exiting.'.format(target_dir))
+        exit(1)
+    if not access(log_dir, W_OK):
+        log.error('{0} is not writable, exiting.'.format(log_dir))
+        exit(1)
+
+    log.basicConfig(filename=options.logfile,
+                    level=log.INFO,
+                    format='%(asctime)s %(message)s')
+
+    # read movie file list
+    log.info('Reading file list from directory {0}'.format(options.moviedir))
+    moviefiles = []
+    signatures = {}
+    for moviefile, size, mtime in scan_movies(options.moviedir, options.recursive):
+        moviefiles.append(moviefile)
+        signatures[moviefile] = (size, mtime)
+
+    # check if there are new, modified or removed movie files
+
+    manifestfile = options.manifest or options.pagefile + '.manifest'
+    if options.force:
+        manifest = {}
+    else:
+        manifest = load_manifest(manifestfile)
+    groups = group_movies(moviefiles)
+    changed, removed = changed_groups(groups, signatures, manifest)
+
+    # generate HTML file
+    # with mirrored covers, always resume the covers not stored yet
+    if changed or removed or not isfile(options.pagefile) or options.force or \
+            options.mirrorcovers:
+        log.info('Found {0} new or modified and {1} removed movies in directory {2}'.format(len(changed), len(removed), options.moviedir))
+        if options.nocache:
+            cache = None
+        else:
+            refresh_older_than = None
+            if options.refresholderthan is not None:
+                refresh_older_than = options.refresholderthan * DAY
+            cache = MovieCache(options.cachefile,
+                               ttl=options.cachettl * DAY,
+                               maxsize=options.cachesize,
+                               refresh_older_than=refresh_older_than)
+        if options.mirrorcovers:
+            mirror = CoverMirror(target_dir, options.coversdir,
+                                 jobs=options.coverjobs)
+        else:
+            mirror = None
+        entries = writehtmlpage(groups, options.pagefile, signatures, manifest,
+                                cache, jobs=options.jobs,
+                                limiter=RateLimiter(options.rate),
+                                shard_size=options.shardsize,
+                                mirror=mirror)
+        save_manifest(manifestfile, entries)
+        if cache is not None:
+            cache.save()
+    else:
+        log.info('No movie changed since the last update, nothing to do.')
+
+    # copy static files
+    for static_file in [CSS_FILE, JS_FILE, LAZY_JS_FILE]:
+        try:
+            shutil.copy(static_file, target_dir)
+        except:
+            log.error('Cannot copy style file {0} in {1}'.format(static_file, target_dir))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Tests of the threads of the asynchronous access system."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb.parser.http import IMDbHTTPAccessSystem
+from imdb.parser.asynchttp import IMDbAsyncHTTPAccessSystem
+
+
+class FakeHTTPAccessSystem(IMDbHTTPAccessSystem):
+    """Return the class, the proxies and the cookie of the worker."""
+    def get_movie(self, movieID):
+        cookies = [v for h, v in self.urlOpener.addheaders if h == 'Cookie']
+        return (self.__class__, self.urlOpener.proxies.get('http'),
+                cookies and cookies[0] or None)
+
+    def _retrieve_many(self, prefix, mopIDs, info, modFunct):
+        yield self.get_movie(mopIDs[0])
+
+
+class FakeAsyncAccessSystem(IMDbAsyncHTTPAccessSystem):
+    _workerClass = FakeHTTPAccessSystem
+
+
+class AsyncTest(unittest.TestCase):
+    def setUp(self):
+        self.ia = FakeAsyncAccessSystem(maxWorkers=2, proxy='')
+        self.ia.del_cookies()
+
+    def tearDown(self):
+        self.ia.close()
+
+    def testWorkersAreBlocking(self):
+        workerClass, proxy, cookie = self.ia.get_movie('0000001').result(5)
+        self.assertEqual(workerClass, FakeHTTPAccessSystem)
+        self.assertEqual((proxy, cookie), (None, None))
+
+    def testWorkersAreRefreshed(self):
+        for x in xrange(4):
+            self.ia.get_movie('0000001').result(5)
+        self.ia.set_proxy('localhost:3128')
+        self.ia.set_cookies('1', '2')
+        for x in xrange(4):
+            result = self.ia.get_movie('0000001').result(5)
+            self.assertEqual(result[1:], ('http://localhost:3128',
+                                            'id=1; uu=2'))
+        self.ia.del_cookies()
+        self.assertEqual(self.ia.get_movie('0000001').result(5)[2], None)
+
+    def testGetMoviesReusesWorker(self):
+        list(self.ia.get_movies(['0000001']))
+        worker = self.ia._blocking
+        self.ia.set_cookies('1', '2')
+        result = list(self.ia.get_movies(['0000001']))[0]
+        self.assertTrue(self.ia._blocking is worker)
+        self.assertEqual(result[0], FakeHTTPAccessSystem)
+        self.assertEqual(result[2], 'id=1; uu=2')
+
+    def testClose(self):
+        self.ia.get_movie('0000001').result(5)
+        self.ia.close()
+        self.assertEqual(self.ia.get_movie('0000001').result(5)[0],
+                        FakeHTTPAccessSystem)
+
+
+if __name__ == '__main__':
+    unittest.main()
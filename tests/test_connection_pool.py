@@ -0,0 +1,146 @@
+"""Tests of the pool of persistent connections of the http access
+system, against a local web server."""
+
+import os
+import sys
+import time
+import socket
+import logging
+import unittest
+import threading
+import BaseHTTPServer
+import SocketServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb.parser.http import IMDbURLopener
+from imdb.parser.http.connectionPool import ConnectionPool
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer with a short page, keeping the connection alive, and
+    record the client port, the path and the headers of every request."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address[1], self.path,
+                                    dict(self.headers.items())))
+        if self.path.endswith('/missing'):
+            code, body = 404, 'not found'
+        else:
+            code, body = 200, 'a page'
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *arguments):
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class FailingPool(ConnectionPool):
+    def _connect(self, scheme, host):
+        raise socket.error(111, 'Connection refused')
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.host = '127.0.0.1:%d' % self.server.server_address[1]
+        self.pool = ConnectionPool(maxPerHost=1, idleTimeout=60)
+        self.opener = IMDbURLopener(pool=self.pool)
+        self.opener.proxies = {}
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+        logging.disable(logging.NOTSET)
+
+    def open(self, path, host=None):
+        fp = self.opener.open('http://%s%s' % (host or self.host, path))
+        try:
+            return fp.read()
+        finally:
+            fp.close()
+
+    def ports(self):
+        return [port for port, path, headers in self.server.requests]
+
+    def testReuse(self):
+        for x in xrange(3):
+            self.assertEqual(self.open('/page'), 'a page')
+        self.assertEqual((self.pool.created, self.pool.reused), (1, 2))
+        self.assertEqual(len(set(self.ports())), 1)
+
+    def testErrorPageIsDrained(self):
+        self.open('/missing')
+        self.open('/page')
+        self.assertEqual((self.pool.created, self.pool.reused), (1, 1))
+        self.assertEqual(len(set(self.ports())), 1)
+
+    def testPerHostLimit(self):
+        conn, reused = self.pool.get('http', self.host)
+        got = []
+        def get():
+            got.append(self.pool.get('http', self.host))
+        thread = threading.Thread(target=get)
+        thread.setDaemon(True)
+        thread.start()
+        thread.join(0.2)
+        self.assertEqual(got, [])
+        self.pool.put('http', self.host, conn)
+        thread.join(5)
+        self.assertEqual(got, [(conn, True)])
+        self.pool.put('http', self.host, conn)
+
+    def testIdleExpiry(self):
+        self.pool.idleTimeout = 0.05
+        self.open('/page')
+        time.sleep(0.2)
+        self.open('/page')
+        self.assertEqual((self.pool.created, self.pool.reused), (2, 0))
+        self.assertEqual(len(set(self.ports())), 2)
+
+    def testProxyAndCookie(self):
+        self.opener.set_proxy('http://%s' % self.host)
+        self.opener.set_header('Cookie', 'id=1; uu=2')
+        self.open('/title/', host='www.imdb.invalid')
+        self.open('/name/', host='www.imdb.invalid')
+        self.assertEqual(len(set(self.ports())), 1)
+        for path, (port, sent, headers) in zip(('/title/', '/name/'),
+                                                self.server.requests):
+            self.assertEqual(sent, 'http://www.imdb.invalid' + path)
+            self.assertEqual(headers['host'], 'www.imdb.invalid')
+            self.assertEqual(headers['cookie'], 'id=1; uu=2')
+
+    def testFailedConnect(self):
+        pool = FailingPool(maxPerHost=1)
+        errors = []
+        def get():
+            for x in xrange(3):
+                try:
+                    pool.get('http', self.host)
+                except socket.error, e:
+                    errors.append(e)
+        thread = threading.Thread(target=get)
+        thread.setDaemon(True)
+        thread.start()
+        thread.join(5)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(pool.created, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
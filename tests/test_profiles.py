@@ -0,0 +1,61 @@
+"""Tests of the info_profiles, used to parse only some keys."""
+
+import os
+import sys
+import logging
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb.Person import Person
+from imdb.parser.http import IMDbHTTPAccessSystem
+
+PERSON_PAGE = '''<html><body>
+<h1 class="header">Lauren Bacall <span>(I)</span></h1>
+<div><h4>Born:</h4>
+<time itemprop="birthDate" datetime="1924-9-16">September 16, 1924</time>
+</div>
+<div id="filmo-head-actor"><a name="actress">Actress</a></div>
+<div>
+<div class="filmo-row odd"><span class="year_column">1946</span>
+<b><a href="/title/tt0038355/">The Big Sleep</a></b><br/>Vivian</div>
+</div>
+<div id="filmo-head-director"><a name="director">Director</a></div>
+<div>
+<div class="filmo-row odd"><span class="year_column">1950</span>
+<b><a href="/title/tt0000001/">A Short</a></b></div>
+</div>
+</body></html>'''
+
+
+class ProfileTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.ia = IMDbHTTPAccessSystem(proxy='')
+        self.ia._retrieve = lambda url, *args, **kwds: PERSON_PAGE
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def update(self, info):
+        person = Person(personID='0000007', accessSystem='http')
+        self.ia.update(person, info)
+        return person
+
+    def testFullUpdate(self):
+        person = self.update('main')
+        self.assertEqual(person['name'], u'Lauren Bacall')
+        self.assertEqual(len(person['actress']), 1)
+        self.assertEqual(len(person['director']), 1)
+
+    def testSummaryUpdate(self):
+        person = self.update('summary')
+        self.assertEqual(person['name'], u'Lauren Bacall')
+        self.assertEqual(person['imdbIndex'], u'I')
+        for key in 'actor', 'actress', 'director':
+            self.assertFalse(key in person.keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests of the references gathered by the DOM parsers."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb.parser.http import movieParser
+from imdb.parser.http.utils import GatherRefs
+
+PAGE = u'''<html><body><div class="info-content">
+<a href="/name/nm0000001/">Fred Astaire</a> and
+<a href="/name/nm0000002/">Lauren <b>Bacall</b></a> in
+<a href="/title/tt0000003/">Some Movie</a> (1999) (TV), as
+<a href="/character/ch0000004/">Somebody</a>;
+<a href="/name/nm0000005/">Jos\xe9 Ferrer</a>
+<a href="/name/nm00000056/">Not a reference</a>
+</div></body></html>'''
+
+
+class GatherRefsTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = movieParser._OBJECTS['movie_parser'][0][0](
+                                                        useModule='lxml')
+
+    def testSameAsPaths(self):
+        dom = self.parser.get_dom(PAGE)
+        grParser = GatherRefs(useModule='lxml')
+        expected = grParser.parse_dom(dom)
+        index = self.parser._index_dom(dom, refs=True)
+        result = grParser.parse_anchors(index['refs'])
+        self.assertEqual(result, expected)
+        for label, refs in result.iteritems():
+            for text, link in refs:
+                self.assertTrue(isinstance(text, unicode))
+
+    def testTypes(self):
+        data = self.parser.parse(PAGE, getRefs=True)
+        self.assertEqual(sorted(data['namesRefs']),
+                        [u'Fred Astaire', u'Jos\xe9 Ferrer', u'Lauren'])
+        self.assertEqual(data['titlesRefs'].keys(),
+                        [u'Some Movie (1999) (TV)'])
+        self.assertEqual(data['charactersRefs'].keys(), [u'Somebody'])
+        for refs, key in ((data['namesRefs'], 'name'),
+                            (data['titlesRefs'], 'title'),
+                            (data['charactersRefs'], 'name')):
+            for name, obj in refs.iteritems():
+                self.assertTrue(isinstance(name, unicode))
+                self.assertTrue(isinstance(obj[key], unicode))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests of the retrieval of many objects at once (get_movies and the
+like) of the sql access system, on a small SQLite database."""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb import IMDb
+
+MISSING = 999
+
+
+def fillDatabase(tables):
+    """Insert a few movies, persons, characters and companies."""
+    t = dict([(table._imdbpyName, table) for table in tables])
+    t['Title'](id=1, title=u'First Movie', kindID=1, productionYear=1999)
+    t['Title'](id=2, title=u'Second Movie', kindID=1, productionYear=2001)
+    t['Title'](id=3, title=u'A Series', kindID=2, productionYear=2005)
+    t['Title'](id=4, title=u'Pilot', kindID=7, productionYear=2005,
+                episodeOfID=3, seasonNr=1, episodeNr=1)
+    t['Name'](id=1, name=u'Doe, John', gender='m')
+    t['Name'](id=2, name=u'Roe, Jane', imdbIndex=u'I', gender='f')
+    t['CharName'](id=1, name=u'Somebody')
+    t['CompanyName'](id=1, name=u'Some Studio', countryCode=u'[us]')
+    t['Keyword'](id=1, keyword=u'robot')
+    cast = [(1, 1, 1, 1, 1), (2, 2, 1, None, 2), (3, 1, 2, 1, 1),
+            (4, 2, 2, None, 8), (5, 1, 4, None, 1)]
+    for castID, personID, movieID, roleID, role in cast:
+        t['CastInfo'](id=castID, personID=personID, movieID=movieID,
+                    personRoleID=roleID, nrOrder=castID, roleID=role)
+    t['MovieInfo'](id=1, movieID=1, infoTypeID=3, info=u'Drama')
+    t['MovieInfo'](id=2, movieID=2, infoTypeID=3, info=u'Comedy')
+    t['MovieInfoIdx'](id=1, movieID=1, infoTypeID=101, info=u'7.5')
+    t['MovieKeyword'](id=1, movieID=1, keywordID=1)
+    t['MovieKeyword'](id=2, movieID=2, keywordID=1)
+    t['MovieCompanies'](id=1, movieID=1, companyID=1, companyTypeID=2,
+                        note=u'(1999)')
+    t['MovieLink'](id=1, movieID=2, linkedMovieID=1, linkTypeID=2)
+    t['AkaTitle'](id=1, movieID=1, title=u'Premier Film', kindID=1,
+                productionYear=1999, note=u'(France)')
+    t['CompleteCast'](id=1, movieID=1, subjectID=1, statusID=3)
+    t['PersonInfo'](id=1, personID=1, infoTypeID=19, info=u'A biography.')
+    t['AkaName'](id=1, personID=2, name=u'Roe, Janie')
+
+
+class CountingTable(object):
+    """Record the rows read one at a time from a table."""
+    def __init__(self, table, gets):
+        self._table = table
+        self._gets = gets
+
+    def get(self, rowID):
+        self._gets.append((self._table._imdbpyName, rowID))
+        return self._table.get(rowID)
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+
+class SqlBatchTestMixin(object):
+    orm = None
+
+    def setUp(self):
+        try:
+            if self.orm == 'sqlobject':
+                from imdb.parser.sql import objectadapter as adapter
+            else:
+                from imdb.parser.sql import alchemyadapter as adapter
+        except ImportError:
+            self.skipTest('%s is not installed' % self.orm)
+        from imdb.parser.sql.dbschema import createTables
+        self.tmpDir = tempfile.mkdtemp()
+        dbFile = os.path.join(self.tmpDir, 'imdb.db')
+        if self.orm == 'sqlobject':
+            uri = 'sqlite:%s' % dbFile
+        else:
+            uri = 'sqlite:///%s' % dbFile
+        tables = adapter.getDBTables(uri)
+        adapter.setConnection(uri, tables)
+        createTables(tables)
+        fillDatabase(tables)
+        self.tables = dict([(t._imdbpyName, t) for t in tables])
+        self.ia = IMDb('sql', uri=uri, useORM=self.orm)
+        # The missing objects are logged as errors.
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+    def assertSameObjects(self, prefix, mopIDs):
+        getOne = getattr(self.ia, 'get_%s' % prefix)
+        getMany = getattr(self.ia, 'get_%ss' % prefix.replace('y', 'ie'))
+        batch = dict([(mop.getID(), mop) for mop in getMany(mopIDs)])
+        self.assertEqual(sorted(batch), sorted(mopIDs))
+        for mopID in mopIDs:
+            mop = getOne(mopID)
+            self.assertEqual(batch[mopID].data, mop.data)
+            self.assertEqual(batch[mopID].current_info, mop.current_info)
+        return batch
+
+    def testMovies(self):
+        movies = self.assertSameObjects('movie', [1, 2, 3, 4, MISSING])
+        self.assertEqual(movies[1]['title'], u'First Movie')
+        self.assertEqual(movies[1]['genres'], [u'Drama'])
+        self.assertEqual(movies[2]['keywords'], [u'robot'])
+        self.assertEqual(movies[3]['number of episodes'], 1)
+        self.assertEqual(movies[4]['episode of']['title'], u'A Series')
+        self.assertEqual(movies[MISSING].data, {})
+
+    def testReferencedTitles(self):
+        sqlModule = sys.modules['imdb.parser.sql']
+        tables = {}
+        gets = []
+        for name in 'Title', 'AkaTitle':
+            tables[name] = getattr(sqlModule, name)
+            setattr(sqlModule, name, CountingTable(tables[name], gets))
+        try:
+            movies = list(self.ia.get_movies([1, 2, 3, MISSING]))
+            persons = list(self.ia.get_persons([1, 2]))
+            characters = list(self.ia.get_characters([1]))
+            companies = list(self.ia.get_companies([1]))
+        finally:
+            for name, table in tables.items():
+                setattr(sqlModule, name, table)
+        self.assertEqual(len(movies) + len(persons) + len(characters) +
+                        len(companies), 8)
+        # The titles of the cast, akas, connections, episodes and
+        # filmographies are read in advance too.
+        self.assertEqual(gets, [])
+
+    def testInterleavedCalls(self):
+        movies = self.ia.get_movies([1, 2])
+        first = movies.next()
+        otherID = 3 - first.movieID
+        self.tables['MovieInfo'](id=3, movieID=otherID, infoTypeID=3,
+                                info=u'Horror')
+        # Not built with the rows read in advance by get_movies.
+        movie = self.ia.get_movie(otherID)
+        self.assertTrue(u'Horror' in movie['genres'])
+        self.assertEqual([m.movieID for m in movies], [otherID])
+
+    def testPersons(self):
+        persons = self.assertSameObjects('person', [1, 2, MISSING])
+        self.assertEqual(persons[2]['name'], u'Jane Roe')
+        self.assertEqual(persons[MISSING].data, {})
+
+    def testCharacters(self):
+        self.assertSameObjects('character', [1, MISSING])
+
+    def testCompanies(self):
+        self.assertSameObjects('company', [1, MISSING])
+
+    def testBatches(self):
+        batches = []
+        prefetchBatch = self.ia._prefetch_batch
+        def _prefetch_batch(prefix, mopIDs):
+            batches.append(list(mopIDs))
+            return prefetchBatch(prefix, mopIDs)
+        self.ia._prefetch_batch = _prefetch_batch
+        self.ia._batchSize = 2
+        self.assertSameObjects('movie', [1, 2, MISSING])
+        self.assertEqual(sorted(sum(batches, [])), [1, 2, MISSING])
+        self.assertEqual(len(batches), 2)
+        # The rows read in advance are dropped at the end of a batch.
+        self.assertEqual(self.ia._batchRows, {})
+
+
+class SQLObjectBatchTest(SqlBatchTestMixin, unittest.TestCase):
+    orm = 'sqlobject'
+
+
+class SQLAlchemyBatchTest(SqlBatchTestMixin, unittest.TestCase):
+    orm = 'sqlalchemy'
+
+
+if __name__ == '__main__':
+    unittest.main()
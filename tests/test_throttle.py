@@ -0,0 +1,83 @@
+"""Tests of the retries and of the circuit breaker of the http access
+system."""
+
+import os
+import sys
+import logging
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb import IMDb
+from imdb._exceptions import IMDbDataAccessError
+
+URL = 'http://www.imdb.com/title/tt0000001/'
+
+
+def networkError():
+    return IMDbDataAccessError({'errcode': 110, 'errmsg': 'timed out',
+                                'exception type': 'IOError'})
+
+def httpError(errcode):
+    return IMDbDataAccessError({'errcode': errcode, 'errmsg': 'error',
+                                'headers': {},
+                                'error type': 'http_error_default'})
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.ia = IMDb('http', maxRetries=0, breakerThreshold=2,
+                        breakerTimeout=0)
+        self.outcomes = []
+        def retrieve_unicode(url, size=-1, stopAt=None):
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        self.ia.urlOpener.retrieve_unicode = retrieve_unicode
+        # The failed requests are logged.
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def openBreaker(self):
+        self.outcomes = [networkError(), networkError()]
+        for i in xrange(2):
+            self.assertRaises(IMDbDataAccessError, self.ia._retrieve, URL)
+        self.assertEqual(self.outcomes, [])
+
+    def assertWorking(self):
+        self.outcomes = [u'page']
+        self.assertEqual(self.ia._retrieve(URL), u'page')
+
+    def testTrialSucceeds(self):
+        self.openBreaker()
+        self.assertWorking()
+        self.assertWorking()
+
+    def testTrialFailsNotRetryable(self):
+        self.openBreaker()
+        self.outcomes = [httpError(403)]
+        self.assertRaises(IMDbDataAccessError, self.ia._retrieve, URL)
+        # The server answered: the circuit is closed again.
+        self.assertEqual(self.outcomes, [])
+        self.assertWorking()
+
+    def testTrialFailsUnexpectedly(self):
+        self.openBreaker()
+        self.outcomes = [ValueError('unexpected')]
+        self.assertRaises(ValueError, self.ia._retrieve, URL)
+        # A new trial is allowed.
+        self.assertWorking()
+
+    def testTrialFailsRetryable(self):
+        self.openBreaker()
+        self.outcomes = [networkError()]
+        self.assertRaises(IMDbDataAccessError, self.ia._retrieve, URL)
+        self.assertWorking()
+
+
+if __name__ == '__main__':
+    unittest.main()
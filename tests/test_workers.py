@@ -0,0 +1,103 @@
+"""Tests of the pools of workers used by update() and get_movies()."""
+
+import os
+import sys
+import copy
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+
+from imdb import IMDbBase
+from imdb.Movie import Movie
+
+
+class FakeAccessSystem(IMDbBase):
+    """Return the name of the info set, and the thread retrieving it."""
+    accessSystem = 'fake'
+
+    def __init__(self, *arguments, **keywords):
+        IMDbBase.__init__(self, *arguments, **keywords)
+        self.workers = []
+        self.cookie = None
+
+    def _worker(self):
+        worker = copy.copy(self)
+        worker._init_pools()
+        worker.workers = []
+        self.workers.append(worker)
+        return worker
+
+    def _refresh_worker(self, worker):
+        worker.cookie = self.cookie
+
+    def _get_real_movieID(self, movieID):
+        return movieID
+
+    def _info_set(self, name):
+        return {'data': {name: [threading.currentThread().getName(),
+                                self.cookie]}}
+
+    def get_movie_main(self, movieID):
+        return self._info_set('main')
+
+    def get_movie_plot(self, movieID):
+        return self._info_set('plot')
+
+    def get_movie_taglines(self, movieID):
+        return self._info_set('taglines')
+
+
+INFO = ('main', 'plot', 'taglines')
+
+
+class WorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.ia = FakeAccessSystem(updateConcurrency=3, batchConcurrency=2)
+
+    def update(self):
+        movie = Movie(movieID='0000001', accessSystem='fake')
+        self.ia.update(movie, INFO)
+        return movie
+
+    def testUpdateReusesWorkers(self):
+        movie = self.update()
+        self.assertEqual(sorted(movie.current_info), sorted(INFO))
+        self.assertEqual(len(self.ia.workers), 3)
+        threads = set([movie[i][0] for i in INFO])
+        self.assertTrue(threading.currentThread().getName() not in threads)
+        for x in xrange(5):
+            self.update()
+        self.assertEqual(len(self.ia.workers), 3)
+
+    def testWorkersAreRefreshed(self):
+        self.update()
+        self.ia.cookie = 'id=1'
+        movie = self.update()
+        for i in INFO:
+            self.assertEqual(movie[i][1], 'id=1')
+
+    def testGetMoviesReusesWorkers(self):
+        for x in xrange(3):
+            movies = list(self.ia.get_movies(['0000001', '0000002',
+                                                '0000003'], info=INFO))
+            self.assertEqual(sorted([m.movieID for m in movies]),
+                            ['0000001', '0000002', '0000003'])
+            for movie in movies:
+                self.assertEqual(sorted(movie.current_info), sorted(INFO))
+        # The workers of get_movies, and the ones used by their update().
+        self.assertEqual(len(self.ia.workers), 2)
+        self.assertEqual([len(w.workers) for w in self.ia.workers], [3, 3])
+
+    def testNoConcurrency(self):
+        ia = FakeAccessSystem()
+        movie = Movie(movieID='0000001', accessSystem='fake')
+        ia.update(movie, INFO)
+        self.assertEqual(ia.workers, [])
+        self.assertEqual(movie['main'][0],
+                        threading.currentThread().getName())
+
+
+if __name__ == '__main__':
+    unittest.main()